@@ -9,89 +9,208 @@ with optional CSV output format.
 import argparse
 import csv
 import sys
-from collections import defaultdict
-from typing import Dict, List
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, Optional, TextIO, Tuple
 
 import sie_parser
 
 
-def list_accounts(sie_data: sie_parser.SieFile, non_zero_only: bool = False, csv_output: bool = False) -> None:
-    """List accounts with their balances and types."""
+# CSV column names, in output order
+_ACCOUNT_FIELDS = ('number', 'name', 'type', 'balance', 'normal_balance', 'sru_code')
+_VOUCHER_FIELDS = ('voucher', 'date', 'description', 'transactions', 'total_amount', 'balance', 'balanced')
+
+# Account type display names, looked up once instead of per row
+_ACCOUNT_TYPE_NAMES = {account_type: account_type.name for account_type in sie_parser.AccountType}
+
+# Table row formatters, matching the field order above
+_ACCOUNT_ROW_FORMAT = "{:<10} {:<30} {:<10} {:>15.2f} {:<8} {:<8}\n".format
+_VOUCHER_ROW_FORMAT = "{:<10} {:<10} {:<25} {:>6} {:>12.2f} {:>12.2f} {:<5}\n".format
+
+
+@dataclass
+class _VoucherTotals:
+    """Per-voucher aggregates collected while walking the entries (in cents)."""
+    date: str
+    description: str
+    transactions: int = 0
+    debit: int = 0   # Sum of positive amounts
+    credit: int = 0  # Sum of negative amounts
+    
+    @property
+    def total_amount(self) -> int:
+        """Sum of absolute amounts."""
+        return self.debit - self.credit
+    
+    @property
+    def balance(self) -> int:
+        """Net amount, zero for a balanced voucher."""
+        return self.debit + self.credit
+
+
+def _aggregate(
+    sie_data: sie_parser.SieFile,
+    entries: Iterable[sie_parser.SieEntry],
+    with_accounts: bool = True,
+    with_vouchers: bool = True,
+) -> Tuple[Dict[str, int], Dict[str, _VoucherTotals], int]:
+    """Aggregate account balances and voucher totals in a single pass over the entries.
+    
+    Amounts are summed as integer hundredths (öre). SIE amounts have at most
+    two decimals, so the sums are exact and a balance is zero exactly when its
+    cent total is zero.
+    
+    Args:
+        sie_data: Parsed SIE data providing the opening balances. Its records
+            are only read once entries is exhausted, so entries may be a
+            sie_parser.iter_entries() stream that fills sie_data as it goes.
+        entries: Transaction entries to aggregate
+        with_accounts: Sum account balances
+        with_vouchers: Collect per-voucher totals
     
-    # Calculate account balances from transactions
-    account_balances: Dict[str, float] = defaultdict(float)
-    for entry in sie_data.entries:
-        account_balances[entry.account_number] += entry.amount
+    Returns:
+        Tuple of (account_balances, voucher_totals, entry_count), with all
+        amounts in integer cents. An aggregate that wasn't asked for is left
+        empty. Account balances include the current year opening balances.
+        Voucher date and description come from the #VER header in
+        sie_data.vouchers, or from the voucher's first entry if it has none.
+    """
+    account_balances: Dict[str, int] = {}
+    voucher_totals: Dict[str, _VoucherTotals] = {}
+    entry_count = 0
+    # Headers are stored before their entries are yielded, so this also works while streaming
+    vouchers = sie_data.vouchers
     
-    # Add opening balances (use period 0 for current year)
-    for balance in sie_data.opening_balances:
-        if balance.period == 0:  # Current year
-            account_balances[balance.account_number] += balance.amount
+    for entry_count, entry in enumerate(entries, 1):
+        amount = round(entry.amount * 100)
+        if with_accounts:
+            try:
+                account_balances[entry.account_number] += amount
+            except KeyError:  # First entry for this account
+                account_balances[entry.account_number] = amount
+        voucher_index = entry.voucher_index
+        if with_vouchers and voucher_index:
+            totals = voucher_totals.get(voucher_index)
+            if totals is None:
+                header = vouchers.get(voucher_index)
+                if header is not None:
+                    totals = _VoucherTotals(header.date, header.description)
+                else:
+                    totals = _VoucherTotals(entry.date or "", entry.description)
+                voucher_totals[voucher_index] = totals
+            totals.transactions += 1
+            if amount >= 0:
+                totals.debit += amount
+            else:
+                totals.credit += amount
     
-    # Prepare account data
-    account_data = []
-    for account_number, account in sie_data.accounts.items():
-        balance = account_balances.get(account_number, 0.0)
+    if with_accounts:
+        # Add opening balances (use period 0 for current year)
+        for balance in sie_data.opening_balances:
+            if balance.period == 0:  # Current year
+                account_balances[balance.account_number] = (
+                    account_balances.get(balance.account_number, 0) + round(balance.amount * 100))
+    
+    return account_balances, voucher_totals, entry_count
+
+
+def _account_balances(sie_data: sie_parser.SieFile,
+                      entries: Iterable[sie_parser.SieEntry]) -> Dict[str, int]:
+    """Sum account balances only, see _aggregate."""
+    return _aggregate(sie_data, entries, with_vouchers=False)[0]
+
+
+def _voucher_totals(sie_data: sie_parser.SieFile,
+                    entries: Iterable[sie_parser.SieEntry]) -> Dict[str, _VoucherTotals]:
+    """Collect per-voucher totals only, see _aggregate."""
+    return _aggregate(sie_data, entries, with_accounts=False)[1]
+
+
+def _account_sort_key(item: Tuple[str, sie_parser.SieAccount]) -> Tuple[int, int, str]:
+    """Sort key ordering numeric account numbers by value, others last."""
+    number = item[0]
+    return (0, int(number), number) if number.isdecimal() else (1, 0, number)
+
+
+def _account_rows(
+    accounts: Dict[str, sie_parser.SieAccount],
+    account_balances: Dict[str, int],
+    non_zero_only: bool,
+) -> Iterator[tuple]:
+    """Yield account rows in _ACCOUNT_FIELDS order, sorted by account number."""
+    for account_number, account in sorted(accounts.items(), key=_account_sort_key):
+        balance = account_balances.get(account_number, 0)
         
         # Skip zero balance accounts if requested
-        if non_zero_only and abs(balance) < 0.01:
+        if non_zero_only and balance == 0:
             continue
-            
-        account_data.append({
-            'number': account_number,
-            'name': account.name,
-            'type': account.type.name,
-            'balance': balance,
-            'normal_balance': account.normal_balance,
-            'sru_code': account.sru_code or ''
-        })
+        
+        yield (account_number, account.name, _ACCOUNT_TYPE_NAMES[account.type], balance / 100,
+               account.normal_balance, account.sru_code or '')
+
+
+def _voucher_rows(voucher_totals: Dict[str, _VoucherTotals]) -> Iterator[tuple]:
+    """Yield voucher rows in _VOUCHER_FIELDS order, sorted by voucher index."""
+    for voucher_index, totals in sorted(voucher_totals.items(), key=itemgetter(0)):
+        balance = totals.balance
+        yield (voucher_index, totals.date, totals.description, totals.transactions,
+               totals.total_amount / 100, balance / 100, 'Yes' if balance == 0 else 'No')
+
+
+def list_accounts(sie_data: sie_parser.SieFile, non_zero_only: bool = False, csv_output: bool = False,
+                  out: Optional[TextIO] = None,
+                  entries: Optional[Iterable[sie_parser.SieEntry]] = None) -> None:
+    """List accounts with their balances and types to out (default: sys.stdout).
+    
+    entries defaults to sie_data.entries; pass a sie_parser.iter_entries()
+    stream filling sie_data to avoid holding every entry in memory.
+    """
+    
+    # Resolved per call so redirections of sys.stdout are honoured
+    if out is None:
+        out = sys.stdout
     
-    # Sort by account number
-    account_data.sort(key=lambda x: x['number'])
+    # Calculate account balances from transactions and opening balances
+    account_balances = _account_balances(sie_data, sie_data.entries if entries is None else entries)
+    
+    # Prepare account rows
+    account_rows = _account_rows(sie_data.accounts, account_balances, non_zero_only)
     
     if csv_output:
-        writer = csv.DictWriter(sys.stdout, fieldnames=['number', 'name', 'type', 'balance', 'normal_balance', 'sru_code'])
-        writer.writeheader()
-        writer.writerows(account_data)
+        writer = csv.writer(out)
+        writer.writerow(_ACCOUNT_FIELDS)
+        writer.writerows(account_rows)
     else:
-        print(f"{'Account':<10} {'Name':<30} {'Type':<10} {'Balance':<15} {'Normal':<8} {'SRU':<8}")
-        print("-" * 85)
-        for account in account_data:
-            print(f"{account['number']:<10} {account['name']:<30} {account['type']:<10} "
-                  f"{account['balance']:>15.2f} {account['normal_balance']:<8} {account['sru_code']:<8}")
+        account_data = list(account_rows)
+        print(f"{'Account':<10} {'Name':<30} {'Type':<10} {'Balance':<15} {'Normal':<8} {'SRU':<8}", file=out)
+        print("-" * 85, file=out)
+        # Write all rows with a single call rather than one print per row
+        out.write("".join(_ACCOUNT_ROW_FORMAT(*row) for row in account_data))
         
-        print(f"\nTotal accounts: {len(account_data)}")
+        print(f"\nTotal accounts: {len(account_data)}", file=out)
 
 
-def show_summary(sie_data: sie_parser.SieFile, csv_output: bool = False) -> None:
-    """Show a comprehensive summary of the SIE file."""
+def show_summary(sie_data: sie_parser.SieFile, csv_output: bool = False,
+                 out: Optional[TextIO] = None,
+                 entries: Optional[Iterable[sie_parser.SieEntry]] = None) -> None:
+    """Show a comprehensive summary of the SIE file to out (default: sys.stdout).
     
-    # Calculate account balances to count non-zero accounts
-    account_balances: Dict[str, float] = defaultdict(float)
-    for entry in sie_data.entries:
-        account_balances[entry.account_number] += entry.amount
+    entries defaults to sie_data.entries, see list_accounts.
+    """
     
-    # Add opening balances (use period 0 for current year)
-    for balance in sie_data.opening_balances:
-        if balance.period == 0:  # Current year
-            account_balances[balance.account_number] += balance.amount
+    # Resolved per call so redirections of sys.stdout are honoured
+    if out is None:
+        out = sys.stdout
     
-    # Count non-zero accounts
-    non_zero_accounts = sum(1 for balance in account_balances.values() if abs(balance) >= 0.01)
+    # Calculate account and voucher balances in one pass
+    account_balances, voucher_totals, entry_count = _aggregate(
+        sie_data, sie_data.entries if entries is None else entries)
     
-    # Count vouchers
-    vouchers = set()
-    for entry in sie_data.entries:
-        if entry.voucher_index:
-            vouchers.add(entry.voucher_index)
+    # Count non-zero accounts
+    non_zero_accounts = sum(1 for balance in account_balances.values() if balance != 0)
     
     # Count balanced vouchers
-    voucher_balances: Dict[str, float] = defaultdict(float)
-    for entry in sie_data.entries:
-        if entry.voucher_index:
-            voucher_balances[entry.voucher_index] += entry.amount
-    
-    balanced_vouchers = sum(1 for balance in voucher_balances.values() if abs(balance) < 0.01)
+    balanced_vouchers = sum(1 for totals in voucher_totals.values() if totals.balance == 0)
     
     # Prepare summary data
     summary_data = {
@@ -110,8 +229,8 @@ def show_summary(sie_data: sie_parser.SieFile, csv_output: bool = False) -> None
         'phone': sie_data.phone,
         'total_accounts': len(sie_data.accounts),
         'non_zero_accounts': non_zero_accounts,
-        'total_entries': len(sie_data.entries),
-        'total_vouchers': len(vouchers),
+        'total_entries': entry_count,
+        'total_vouchers': len(voucher_totals),
         'balanced_vouchers': balanced_vouchers,
         'opening_balances': len(sie_data.opening_balances),
         'closing_balances': len(sie_data.closing_balances),
@@ -120,113 +239,96 @@ def show_summary(sie_data: sie_parser.SieFile, csv_output: bool = False) -> None
     }
     
     if csv_output:
-        writer = csv.DictWriter(sys.stdout, fieldnames=summary_data.keys())
+        writer = csv.DictWriter(out, fieldnames=summary_data.keys())
         writer.writeheader()
         writer.writerow(summary_data)
     else:
-        print("SIE File Summary")
-        print("=" * 50)
-        print()
+        print("SIE File Summary", file=out)
+        print("=" * 50, file=out)
+        print(file=out)
         
         # Company Information
-        print("Company Information:")
-        print(f"  Name: {summary_data['company_name']}")
-        print(f"  ID: {summary_data['company_id']}")
-        print(f"  Period: {summary_data['period_start']} - {summary_data['period_end']}")
+        print("Company Information:", file=out)
+        print(f"  Name: {summary_data['company_name']}", file=out)
+        print(f"  ID: {summary_data['company_id']}", file=out)
+        print(f"  Period: {summary_data['period_start']} - {summary_data['period_end']}", file=out)
         if summary_data['currency']:
-            print(f"  Currency: {summary_data['currency']}")
-        print()
+            print(f"  Currency: {summary_data['currency']}", file=out)
+        print(file=out)
         
         # Contact Information
         if any([summary_data['contact_person'], summary_data['address_line1'], summary_data['phone']]):
-            print("Contact Information:")
+            print("Contact Information:", file=out)
             if summary_data['contact_person']:
-                print(f"  Contact: {summary_data['contact_person']}")
+                print(f"  Contact: {summary_data['contact_person']}", file=out)
             if summary_data['address_line1']:
-                print(f"  Address: {summary_data['address_line1']}")
+                print(f"  Address: {summary_data['address_line1']}", file=out)
             if summary_data['address_line2']:
-                print(f"           {summary_data['address_line2']}")
+                print(f"           {summary_data['address_line2']}", file=out)
             if summary_data['phone']:
-                print(f"  Phone: {summary_data['phone']}")
-            print()
+                print(f"  Phone: {summary_data['phone']}", file=out)
+            print(file=out)
         
         # File Information
-        print("File Information:")
-        print(f"  Format: {summary_data['file_format']}")
-        print(f"  SIE Type: {summary_data['sie_type']}")
+        print("File Information:", file=out)
+        print(f"  Format: {summary_data['file_format']}", file=out)
+        print(f"  SIE Type: {summary_data['sie_type']}", file=out)
         if summary_data['program']:
-            print(f"  Generated by: {summary_data['program']}")
+            print(f"  Generated by: {summary_data['program']}", file=out)
         if summary_data['generation_date']:
-            print(f"  Generated on: {summary_data['generation_date']}")
-        print()
+            print(f"  Generated on: {summary_data['generation_date']}", file=out)
+        print(file=out)
         
         # Data Summary
-        print("Data Summary:")
-        print(f"  Total Accounts: {summary_data['total_accounts']}")
-        print(f"  Non-zero Accounts: {summary_data['non_zero_accounts']}")
-        print(f"  Total Transactions: {summary_data['total_entries']}")
-        print(f"  Total Vouchers: {summary_data['total_vouchers']}")
-        print(f"  Balanced Vouchers: {summary_data['balanced_vouchers']}/{summary_data['total_vouchers']}")
+        print("Data Summary:", file=out)
+        print(f"  Total Accounts: {summary_data['total_accounts']}", file=out)
+        print(f"  Non-zero Accounts: {summary_data['non_zero_accounts']}", file=out)
+        print(f"  Total Transactions: {summary_data['total_entries']}", file=out)
+        print(f"  Total Vouchers: {summary_data['total_vouchers']}", file=out)
+        print(f"  Balanced Vouchers: {summary_data['balanced_vouchers']}/{summary_data['total_vouchers']}", file=out)
         
         if summary_data['opening_balances'] > 0:
-            print(f"  Opening Balances: {summary_data['opening_balances']}")
+            print(f"  Opening Balances: {summary_data['opening_balances']}", file=out)
         if summary_data['closing_balances'] > 0:
-            print(f"  Closing Balances: {summary_data['closing_balances']}")
+            print(f"  Closing Balances: {summary_data['closing_balances']}", file=out)
         if summary_data['dimensions'] > 0:
-            print(f"  Dimensions: {summary_data['dimensions']}")
+            print(f"  Dimensions: {summary_data['dimensions']}", file=out)
         if summary_data['objects'] > 0:
-            print(f"  Dimension Objects: {summary_data['objects']}")
+            print(f"  Dimension Objects: {summary_data['objects']}", file=out)
 
 
-def list_vouchers(sie_data: sie_parser.SieFile, csv_output: bool = False) -> None:
-    """List all vouchers with their transaction summaries."""
+def list_vouchers(sie_data: sie_parser.SieFile, csv_output: bool = False,
+                  out: Optional[TextIO] = None,
+                  entries: Optional[Iterable[sie_parser.SieEntry]] = None) -> None:
+    """List all vouchers with their transaction summaries to out (default: sys.stdout).
     
-    # Group transactions by voucher
-    vouchers: Dict[str, List[sie_parser.SieEntry]] = defaultdict(list)
-    for entry in sie_data.entries:
-        if entry.voucher_index:
-            vouchers[entry.voucher_index].append(entry)
+    entries defaults to sie_data.entries, see list_accounts.
+    """
     
-    # Prepare voucher data
-    voucher_data = []
-    for voucher_index, entries in vouchers.items():
-        total_amount = sum(abs(entry.amount) for entry in entries)
-        balance = sum(entry.amount for entry in entries)
-        
-        # Get voucher description from first entry
-        description = entries[0].description if entries else ""
-        
-        # Get voucher date from first entry
-        date = entries[0].date if entries and entries[0].date else ""
-        
-        voucher_data.append({
-            'voucher': voucher_index,
-            'date': date,
-            'description': description,
-            'transactions': len(entries),
-            'total_amount': total_amount,
-            'balance': balance,
-            'balanced': 'Yes' if abs(balance) < 0.01 else 'No'
-        })
+    # Resolved per call so redirections of sys.stdout are honoured
+    if out is None:
+        out = sys.stdout
+    
+    # Aggregate transactions by voucher
+    voucher_totals = _voucher_totals(sie_data, sie_data.entries if entries is None else entries)
     
-    # Sort by voucher index
-    voucher_data.sort(key=lambda x: x['voucher'])
+    # Prepare voucher rows
+    voucher_rows = _voucher_rows(voucher_totals)
     
     if csv_output:
-        writer = csv.DictWriter(sys.stdout, fieldnames=['voucher', 'date', 'description', 'transactions', 'total_amount', 'balance', 'balanced'])
-        writer.writeheader()
-        writer.writerows(voucher_data)
+        writer = csv.writer(out)
+        writer.writerow(_VOUCHER_FIELDS)
+        writer.writerows(voucher_rows)
     else:
-        print(f"{'Voucher':<10} {'Date':<10} {'Description':<25} {'Trans':<6} {'Amount':<12} {'Balance':<12} {'Bal?':<5}")
-        print("-" * 85)
-        for voucher in voucher_data:
-            print(f"{voucher['voucher']:<10} {voucher['date']:<10} {voucher['description']:<25} "
-                  f"{voucher['transactions']:>6} {voucher['total_amount']:>12.2f} "
-                  f"{voucher['balance']:>12.2f} {voucher['balanced']:<5}")
+        voucher_data = list(voucher_rows)
+        print(f"{'Voucher':<10} {'Date':<10} {'Description':<25} {'Trans':<6} {'Amount':<12} {'Balance':<12} {'Bal?':<5}", file=out)
+        print("-" * 85, file=out)
+        # Write all rows with a single call rather than one print per row
+        out.write("".join(_VOUCHER_ROW_FORMAT(*row) for row in voucher_data))
         
-        print(f"\nTotal vouchers: {len(voucher_data)}")
-        balanced_count = sum(1 for v in voucher_data if v['balanced'] == 'Yes')
-        print(f"Balanced vouchers: {balanced_count}/{len(voucher_data)}")
+        print(f"\nTotal vouchers: {len(voucher_data)}", file=out)
+        balanced_count = sum(1 for row in voucher_data if row[-1] == 'Yes')
+        print(f"Balanced vouchers: {balanced_count}/{len(voucher_data)}", file=out)
 
 
 def main():
@@ -257,17 +359,24 @@ Examples:
     
     args = parser.parse_args()
     
+    # csv.writer emits its own \r\n line terminators, so keep the text layer
+    # from translating newlines again (which doubles the \r on Windows)
+    if args.csv and hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(newline='')
+    
     try:
-        # Parse the SIE file
-        sie_data = sie_parser.parse_sie_file(args.file, encoding=args.encoding)
+        # Stream the entries: every command only needs their aggregates, and
+        # the other records are collected into sie_data as the file is read
+        sie_data = sie_parser.SieFile()
+        entries = sie_parser.iter_entries(args.file, encoding=args.encoding, sie_file=sie_data)
         
         # Execute the requested command
         if args.command == 'accounts':
-            list_accounts(sie_data, non_zero_only=args.non_zero, csv_output=args.csv)
+            list_accounts(sie_data, non_zero_only=args.non_zero, csv_output=args.csv, entries=entries)
         elif args.command == 'vouchers':
-            list_vouchers(sie_data, csv_output=args.csv)
+            list_vouchers(sie_data, csv_output=args.csv, entries=entries)
         elif args.command == 'summary':
-            show_summary(sie_data, csv_output=args.csv)
+            show_summary(sie_data, csv_output=args.csv, entries=entries)
             
     except FileNotFoundError:
         print(f"Error: File '{args.file}' not found", file=sys.stderr)
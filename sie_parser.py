@@ -27,8 +27,10 @@ __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
 import re
+import sys
+from functools import lru_cache
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, TextIO, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
 from datetime import datetime
 from enum import Enum
 
@@ -48,10 +50,10 @@ class AccountType(Enum):
     @classmethod
     def from_sie_code(cls, code: str) -> 'AccountType':
         """Create AccountType from SIE single-letter code."""
-        for account_type in cls:
-            if account_type.value == code:
-                return account_type
-        raise ValueError(f"Unknown SIE account type code: {code}")
+        try:
+            return cls(code)
+        except ValueError:
+            raise ValueError(f"Unknown SIE account type code: {code}") from None
     
     @property
     def normal_balance(self) -> str:
@@ -116,6 +118,20 @@ class SieEntry:
     dimensions: Dict[str, str] = field(default_factory=dict)
 
 
+@dataclass
+class SieVoucher:
+    """Represents a voucher header (#VER record)."""
+    series: str
+    number: str
+    date: str
+    description: str = ""
+    
+    @property
+    def index(self) -> str:
+        """Return the voucher index used by SieEntry.voucher_index (series + number)."""
+        return f"{self.series}{self.number}"
+
+
 @dataclass
 class SieBalance:
     """Represents a balance record (IB, UB, RES)."""
@@ -169,6 +185,7 @@ class SieFile:
     # Data collections
     accounts: Dict[str, SieAccount] = field(default_factory=dict)
     entries: List[SieEntry] = field(default_factory=list)
+    vouchers: Dict[str, SieVoucher] = field(default_factory=dict)
     opening_balances: List[SieBalance] = field(default_factory=list)
     closing_balances: List[SieBalance] = field(default_factory=list)
     result_balances: List[SieBalance] = field(default_factory=list)
@@ -178,6 +195,48 @@ class SieFile:
 
 
 # Utility Functions
+# BAS account class (first digit) to account type. Classes not listed,
+# including 4xxx-7xxx (various costs/expenses), default to EXPENSE.
+_BAS_CLASS_TYPES: Dict[str, AccountType] = {
+    '1': AccountType.ASSET,      # Tillgångar
+    '2': AccountType.LIABILITY,  # Eget kapital och skulder
+    '3': AccountType.INCOME,     # Rörelsens inkomster/intäkter
+}
+
+# BAS 8xxx account groups to account type. 8xxx accounts not listed
+# default to EXPENSE, as most of them are expense-related.
+_BAS_8_GROUP_TYPES: Dict[str, AccountType] = {
+    # 801x: Utdelning på andelar i koncernföretag (Dividends from group companies)
+    '801': AccountType.INCOME,
+    # 802x: Resultat vid försäljning av andelar i koncernföretag (Results from sale of shares) - Can be income or expense, default to expense
+    '802': AccountType.EXPENSE,
+    # 803x: Resultatandelar från handelsbolag (Result shares from partnerships)
+    '803': AccountType.INCOME,
+    # 807x-808x: Nedskrivningar och återföringar (Write-downs and reversals)
+    '807': AccountType.EXPENSE,  # Write-downs are expenses
+    '808': AccountType.INCOME,  # Reversals of write-downs are income
+    # 81xx: Resultat från andelar i intresseföretag (Results from associated companies)
+    '81': AccountType.INCOME,
+    # 82xx: Resultat från övriga värdepapper (Results from other securities)
+    '82': AccountType.INCOME,
+    # 83xx: Övriga ränteintäkter (Other interest income)
+    '83': AccountType.INCOME,
+    # 84xx: Räntekostnader (Interest expenses)
+    '84': AccountType.EXPENSE,
+    # 85xx-87xx: Free account groups
+    '85': AccountType.EXPENSE,
+    '86': AccountType.EXPENSE,
+    '87': AccountType.EXPENSE,
+    # 88xx: Bokslutsdispositioner (Year-end appropriations)
+    '88': AccountType.EXPENSE,
+    # 89xx: Skatter och årets resultat (Taxes and year result)
+    '89': AccountType.EXPENSE,
+}
+
+
+# Account numbers repeat across files and callers, and the result is a pure
+# function of the number; 4096 entries comfortably hold a full BAS chart
+@lru_cache(maxsize=4096)
 def get_bas_account_type(account_number: str) -> AccountType:
     """Get the BAS standard account type based on account number.
     
@@ -203,81 +262,467 @@ def get_bas_account_type(account_number: str) -> AccountType:
         
     first_digit = account_number[0]
     
-    # Asset accounts (1xxx) - Tillgångar
-    if first_digit == '1':
-        return AccountType.ASSET
-    # Liability and Equity accounts (2xxx) - Eget kapital och skulder
-    elif first_digit == '2':
-        return AccountType.LIABILITY
-    # Revenue accounts (3xxx) - Rörelsens inkomster/intäkter
-    elif first_digit == '3':
-        return AccountType.INCOME
-    # Expense accounts (4xxx-7xxx) - Various costs/expenses
-    elif first_digit in ['4', '5', '6', '7']:
-        return AccountType.EXPENSE
     # Financial accounts (8xxx) - Mixed income and expense accounts
-    # Default to expense (T) as most 8xxx accounts are expense-related
-    elif first_digit == '8':
-        # More detailed classification for 8xxx accounts based on BAS 2025
-        if len(account_number) >= 4:
-            # 801x: Utdelning på andelar i koncernföretag (Dividends from group companies) - Income
-            if account_number.startswith('801'):
-                return AccountType.INCOME
-            # 802x: Resultat vid försäljning av andelar i koncernföretag (Results from sale of shares) - Can be income or expense, default to expense
-            elif account_number.startswith('802'):
-                return AccountType.EXPENSE
-            # 803x: Resultatandelar från handelsbolag (Result shares from partnerships) - Income
-            elif account_number.startswith('803'):
-                return AccountType.INCOME
-            # 807x-808x: Nedskrivningar och återföringar (Write-downs and reversals) - Expense/Income
-            elif account_number.startswith('807'):
-                return AccountType.EXPENSE  # Write-downs are expenses
-            elif account_number.startswith('808'):
-                return AccountType.INCOME  # Reversals of write-downs are income
-            # 81xx: Resultat från andelar i intresseföretag (Results from associated companies) - Income  
-            elif account_number.startswith('81'):
-                return AccountType.INCOME
-            # 82xx: Resultat från övriga värdepapper (Results from other securities) - Income
-            elif account_number.startswith('82'):
-                return AccountType.INCOME
-            # 83xx: Övriga ränteintäkter (Other interest income) - Income
-            elif account_number.startswith('83'):
-                return AccountType.INCOME
-            # 84xx: Räntekostnader (Interest expenses) - Expense
-            elif account_number.startswith('84'):
-                return AccountType.EXPENSE
-            # 85xx-87xx: Free account groups - default to expense
-            elif account_number.startswith('85') or account_number.startswith('86') or account_number.startswith('87'):
-                return AccountType.EXPENSE
-            # 88xx: Bokslutsdispositioner (Year-end appropriations) - Expense
-            elif account_number.startswith('88'):
-                return AccountType.EXPENSE
-            # 89xx: Skatter och årets resultat (Taxes and year result) - Expense
-            elif account_number.startswith('89'):
-                return AccountType.EXPENSE
-        # Default 8xxx to expense if we can't determine more specifically
-        return AccountType.EXPENSE
-    # Default to EXPENSE for unknown accounts
-    else:
-        return AccountType.EXPENSE
+    # More detailed classification for 8xxx accounts based on BAS 2025
+    if first_digit == '8' and len(account_number) >= 4:
+        # Three-digit groups take precedence over the two-digit ones
+        account_type = _BAS_8_GROUP_TYPES.get(account_number[:3])
+        if account_type is None:
+            account_type = _BAS_8_GROUP_TYPES.get(account_number[:2], AccountType.EXPENSE)
+        return account_type
+    
+    # Default to EXPENSE for 4xxx-7xxx, remaining 8xxx and unknown accounts
+    return _BAS_CLASS_TYPES.get(first_digit, AccountType.EXPENSE)
+
+
+# Matches a double-quoted field, capturing its content
+_QUOTED_RE = re.compile(r'"([^"]*)"')
+
+# #VER series verno verdate [vertext] ...; vertext can be quoted or unquoted,
+# a quoted vertext may contain backslash-escaped quotes (\"), and an
+# unterminated quote runs to the end of the line
+_VER_RE = re.compile(r'#VER\s+(\S+)\s+(\S+)\s+(\S+)(?:\s+(?:"((?:[^"\\]|\\.)*)"?|(\S+)))?')
+
+# Amounts may use a decimal comma
+_COMMA_TO_DOT = str.maketrans(',', '.')
+
+
+# A token in a #TRANS object list: a quoted string (captured without its
+# quotes, and may contain spaces) or a run of non-space characters
+_OBJECT_TOKEN_RE = re.compile(r'"([^"]*)"|([^\s"]+)')
 
 
+def _parse_amount(token: str) -> float:
+    """Parse an amount or quantity, accepting a decimal comma."""
+    # Most files use a decimal point, so only translate when needed
+    return float(token.translate(_COMMA_TO_DOT) if ',' in token else token)
 
 
+def _after_tag(line: str) -> str:
+    """Return the stripped text following the record tag, or "" if there is none."""
+    return line.partition(' ')[2].strip()
+
 
 def _extract_quoted_value(line: str) -> str:
     """Extract value between quotes from a line"""
-    match = re.search(r'"([^"]*)"', line)
+    match = _QUOTED_RE.search(line)
     return match.group(1) if match else ""
 
 
+class _ParseState:
+    """Mutable state shared by the record handlers while parsing one file."""
+    
+    __slots__ = ('sie_file', 'current_voucher', 'current_voucher_index', 'in_voucher_block',
+                 'ktyp_records', 'sru_records')
+    
+    def __init__(self, sie_file: SieFile):
+        self.sie_file = sie_file
+        self.current_voucher: Optional[SieVoucher] = None
+        self.current_voucher_index: Optional[str] = None
+        self.in_voucher_block = False
+        # KTYP and SRU records by account number, applied when the KONTO is parsed
+        self.ktyp_records: Dict[str, AccountType] = {}
+        self.sru_records: Dict[str, str] = {}
+
+
+# Record handlers. Each takes the parse state and the stripped line, and
+# returns a SieEntry for #TRANS records and None for everything else.
+def _parse_flagga(state: _ParseState, line: str) -> None:
+    state.sie_file.file_flag = _after_tag(line)
+
+
+def _parse_format(state: _ParseState, line: str) -> None:
+    state.sie_file.file_format = _after_tag(line)
+
+
+def _parse_sietyp(state: _ParseState, line: str) -> None:
+    state.sie_file.sie_type = _after_tag(line)
+
+
+def _parse_program(state: _ParseState, line: str) -> None:
+    state.sie_file.program = _extract_quoted_value(line) or _after_tag(line)
+
+
+def _parse_gen(state: _ParseState, line: str) -> None:
+    state.sie_file.generation_date = _after_tag(line)
+
+
+def _parse_fnr(state: _ParseState, line: str) -> None:
+    state.sie_file.file_number = _extract_quoted_value(line) or _after_tag(line)
+
+
+def _parse_valuta(state: _ParseState, line: str) -> None:
+    state.sie_file.currency = _after_tag(line)
+
+
+def _parse_taxar(state: _ParseState, line: str) -> None:
+    state.sie_file.tax_year = _after_tag(line)
+
+
+def _parse_kptyp(state: _ParseState, line: str) -> None:
+    state.sie_file.account_plan_type = _after_tag(line)
+
+
+def _parse_adress(state: _ParseState, line: str) -> None:
+    sie_file = state.sie_file
+    # Parse address with multiple quoted fields
+    parts = _QUOTED_RE.findall(line)
+    if len(parts) >= 1:
+        sie_file.contact_person = parts[0]
+    if len(parts) >= 2:
+        sie_file.address_line1 = parts[1]
+    if len(parts) >= 3:
+        sie_file.address_line2 = parts[2]
+    if len(parts) >= 4:
+        sie_file.phone = parts[3]
+
+
+def _parse_fnamn(state: _ParseState, line: str) -> None:
+    state.sie_file.company_name = _extract_quoted_value(line)
+
+
+def _parse_orgnr(state: _ParseState, line: str) -> None:
+    state.sie_file.company_id = line.split(' ', 1)[1].strip()
+
+
+def _parse_rar(state: _ParseState, line: str) -> None:
+    parts = line.split(' ')
+    if len(parts) >= 3:
+        period = int(parts[1]) if parts[1].lstrip('-').isdigit() else 0
+        # Only use period 0 (current year) for the main period dates
+        if period == 0:
+            state.sie_file.period_start = parts[2]
+            state.sie_file.period_end = parts[3] if len(parts) > 3 else ""
+
+
+def _parse_konto(state: _ParseState, line: str) -> None:
+    # Extract account number and name, handling both quoted and unquoted names
+    parts = line.split(' ', 2)  # Split into max 3 parts
+    if len(parts) >= 3:
+        # Interned to match the account numbers interned at #TRANS
+        number = sys.intern(parts[1].strip())
+        name = parts[2].strip()
+        # Remove quotes if present
+        if name.startswith('"') and name.endswith('"'):
+            name = name[1:-1]
+        # KTYP and SRU records may come before the KONTO they refer to
+        acc_type = state.ktyp_records.get(number)
+        if acc_type is None:
+            acc_type = get_bas_account_type(number)
+        state.sie_file.accounts[number] = SieAccount(
+            number=number, name=name, type=acc_type,
+            sru_code=state.sru_records.get(number, "")
+        )
+
+
+def _parse_ktyp(state: _ParseState, line: str) -> None:
+    # Apply to the account if already defined, and keep the record for a later KONTO
+    parts = line.split()
+    if len(parts) >= 3:
+        account_number = parts[1]
+        account_type = AccountType.from_sie_code(parts[2])
+        state.ktyp_records[account_number] = account_type
+        account = state.sie_file.accounts.get(account_number)
+        if account is not None:
+            account.type = account_type
+
+
+def _parse_sru(state: _ParseState, line: str) -> None:
+    # Apply to the account if already defined, and keep the record for a later KONTO
+    parts = line.split()
+    if len(parts) >= 3:
+        account_number = parts[1]
+        sru_code = parts[2]
+        state.sru_records[account_number] = sru_code
+        account = state.sie_file.accounts.get(account_number)
+        if account is not None:
+            account.sru_code = sru_code
+
+
+def _parse_dim(state: _ParseState, line: str) -> None:
+    # Parse dimension definitions
+    parts = line.split(' ', 2)
+    if len(parts) >= 3:
+        dim_number = parts[1]
+        dim_name = parts[2].strip()
+        if dim_name.startswith('"') and dim_name.endswith('"'):
+            dim_name = dim_name[1:-1]
+        state.sie_file.dimensions[dim_number] = SieDimension(number=dim_number, name=dim_name)
+
+
+def _parse_objekt(state: _ParseState, line: str) -> None:
+    # Parse object definitions
+    parts = line.split(' ', 3)
+    if len(parts) >= 4:
+        dimension = parts[1]
+        obj_number = parts[2]
+        obj_name = parts[3].strip()
+        if obj_name.startswith('"') and obj_name.endswith('"'):
+            obj_name = obj_name[1:-1]
+        key = f"{dimension}:{obj_number}"
+        state.sie_file.objects[key] = SieObject(dimension=dimension, number=obj_number, name=obj_name)
+
+
+def _parse_balance(line: str) -> Optional[SieBalance]:
+    """Parse an #IB, #UB or #RES record: tag period account amount [quantity]."""
+    parts = line.split()
+    if len(parts) < 4:
+        return None
+    return SieBalance(
+        account_number=sys.intern(parts[2]),
+        period=int(parts[1]),
+        amount=_parse_amount(parts[3]),
+        quantity=_parse_amount(parts[4]) if len(parts) > 4 else 0.0
+    )
+
+
+def _parse_ib(state: _ParseState, line: str) -> None:
+    # Parse opening balances
+    balance = _parse_balance(line)
+    if balance is not None:
+        state.sie_file.opening_balances.append(balance)
+
+
+def _parse_ub(state: _ParseState, line: str) -> None:
+    # Parse closing balances
+    balance = _parse_balance(line)
+    if balance is not None:
+        state.sie_file.closing_balances.append(balance)
+
+
+def _parse_res(state: _ParseState, line: str) -> None:
+    # Parse result balances
+    balance = _parse_balance(line)
+    if balance is not None:
+        state.sie_file.result_balances.append(balance)
+
+
+def _parse_ver(state: _ParseState, line: str) -> None:
+    # Start of a new voucher - only set if not already in a voucher block
+    if not state.in_voucher_block:
+        match = _VER_RE.match(line)
+        if match:
+            series, number, date, quoted_description, description = match.groups()
+            if quoted_description is not None:
+                description = quoted_description
+                if '\\' in description:
+                    description = description.replace('\\"', '"')
+            elif description is None:
+                description = ""
+            
+            current_voucher = SieVoucher(
+                series=series,  # Series (A, B, etc.)
+                number=number,  # Voucher number within the series
+                # Many vouchers share a date, so keep a single copy of each
+                date=sys.intern(date),
+                description=description
+            )
+            # Compute the index once per voucher rather than per #TRANS
+            state.current_voucher = current_voucher
+            state.current_voucher_index = current_voucher.index
+            state.sie_file.vouchers[state.current_voucher_index] = current_voucher
+
+
+def _parse_trans(state: _ParseState, line: str) -> Optional[SieEntry]:
+    # Transaction within a voucher - only process if we're in a voucher block and have a current voucher
+    current_voucher = state.current_voucher
+    if not (state.in_voucher_block and current_voucher):
+        return None
+    
+    # Parse transaction line according to SIE specification:
+    # Format: #TRANS account no {object list} amount transdate transtext quantity sign
+    # Work on indices into line rather than splitting it, since this is
+    # by far the most frequent record in a file
+    account_end = line.find(' ', 7)  # Account number follows "#TRANS "
+    if account_end == -1:
+        return None
+    
+    # Intern account numbers: there are few distinct ones shared by many
+    # entries, and interned keys make the balance dict lookups cheaper
+    account_number = sys.intern(line[7:account_end])
+    
+    line_len = len(line)
+    i = account_end + 1
+    while i < line_len and line[i] == ' ':
+        i += 1
+    
+    # Find the object list (between { and }), keeping only its bounds
+    dimensions = {}
+    if line.startswith('{', i):
+        # Find the closing brace; a malformed object list is treated as no objects
+        brace_end = line.find('}', i)
+        if brace_end != -1:
+            # Parse dimensions unless the list is empty, which is the common case
+            # Format: dimension_id "object_id" [dimension_id "object_id" ...]
+            # Example: 6 "102" means dimension 6, object 102
+            if brace_end > i + 1:
+                tokens = [quoted or bare for quoted, bare in _OBJECT_TOKEN_RE.findall(line, i + 1, brace_end)]
+                # Pair up dimension ids and object ids; a trailing odd token is ignored
+                dimensions = dict(zip(tokens[::2], tokens[1::2]))
+            i = brace_end + 1
+            while i < line_len and line[i] == ' ':
+                i += 1
+    
+    # Parse remaining fields: amount [transdate] [transtext] [quantity] [sign]
+    # Only the amount is used
+    amount = 0.0
+    if i < line_len:
+        amount_end = line.find(' ', i)
+        amount_str = line[i:amount_end] if amount_end != -1 else line[i:]
+        if amount_str != '{}':
+            amount = _parse_amount(amount_str)
+
+    # Create entry with dimensions
+    return SieEntry(
+        date=current_voucher.date,
+        account_number=account_number,
+        amount=amount,
+        description=current_voucher.description,
+        voucher_index=state.current_voucher_index,
+        dimensions=dimensions
+    )
+
+
+# Handler lookup keyed on the record tag (the first token of the line)
+_RECORD_HANDLERS: Dict[str, Callable[[_ParseState, str], Optional[SieEntry]]] = {
+    # File metadata
+    '#FLAGGA': _parse_flagga,
+    '#FORMAT': _parse_format,
+    '#SIETYP': _parse_sietyp,
+    '#PROGRAM': _parse_program,
+    '#GEN': _parse_gen,
+    '#FNR': _parse_fnr,
+    '#VALUTA': _parse_valuta,
+    '#TAXAR': _parse_taxar,
+    '#KPTYP': _parse_kptyp,
+    '#ADRESS': _parse_adress,
+    # Company metadata
+    '#FNAMN': _parse_fnamn,
+    '#ORGNR': _parse_orgnr,
+    '#RAR': _parse_rar,
+    # Accounts, dimensions and balances
+    '#KONTO': _parse_konto,
+    '#KTYP': _parse_ktyp,
+    '#SRU': _parse_sru,
+    '#DIM': _parse_dim,
+    '#OBJEKT': _parse_objekt,
+    '#IB': _parse_ib,
+    '#UB': _parse_ub,
+    '#RES': _parse_res,
+    # Vouchers and transactions
+    '#VER': _parse_ver,
+    '#TRANS': _parse_trans,
+}
+
+
+def _split_bare_cr(lines: Iterable[str]) -> Iterator[str]:
+    """Yield lines, splitting any that still contain bare carriage returns.
+    
+    File objects opened without newline translation of bare CRs (such as
+    io.StringIO) return a CR-only file as a single line.
+    """
+    for line in lines:
+        if '\r' in line and '\r' in line.rstrip('\r\n'):
+            yield from line.splitlines()
+        else:
+            yield line
+
+
+def _iter_sie(file: Iterable[str], sie_file: SieFile) -> Iterator[SieEntry]:
+    """
+    Parse SIE data into sie_file, yielding transaction entries as they are read.
+    
+    All records except #TRANS are stored on sie_file. Entries are yielded
+    instead of being appended to sie_file.entries, so callers decide whether
+    to keep them. Placeholder accounts for KTYP records without a matching
+    KONTO are added once the input is exhausted.
+    
+    Raises:
+        SieParseError: If there's an error parsing the file
+    """
+    state = _ParseState(sie_file)
+    
+    # Lines are read from the file as they are needed rather than loading
+    # it all up front.
+    for line_num, line in enumerate(file, 1):
+        if line_num == 1 and line.startswith('\ufeff'):  # Remove BOM if present
+            line = line[1:]
+        
+        # Normalize tabs to spaces for consistent parsing
+        # Some SIE generators (like WintAccounting) use tabs instead of spaces
+        line = line.replace('\t', ' ').strip()
+        if not line:
+            continue
+            
+        try:
+            # Branch on the first character: records are by far the most
+            # common lines, followed by the voucher block delimiters
+            first_char = line[0]
+            if first_char == '#':
+                # Dispatch on the record tag; unknown records are ignored
+                handler = _RECORD_HANDLERS.get(line.split(' ', 1)[0])
+                if handler is not None:
+                    entry = handler(state, line)
+                    if entry is not None:
+                        yield entry
+            elif first_char == '{':
+                if line == '{':
+                    state.in_voucher_block = True
+            elif first_char == '}':
+                if line == '}':
+                    state.in_voucher_block = False
+                    state.current_voucher = None  # Reset voucher when block ends
+                        
+        except (ValueError, IndexError) as e:
+            raise SieParseError(f"Error parsing line: {str(e)}", line_num, line)
+    
+    # Create placeholder accounts for KTYP records without a KONTO
+    accounts = sie_file.accounts
+    for account_number, account_type in state.ktyp_records.items():
+        if account_number not in accounts:
+            accounts[account_number] = SieAccount(
+                number=account_number, 
+                name=f"Account {account_number}",  # Placeholder name
+                type=account_type,
+                sru_code=state.sru_records.get(account_number, "")
+            )
+    # Note: We don't create accounts for SRU-only records as they should have KONTO records
+
+
+def _encoding_error(encoding: str, error: UnicodeDecodeError) -> SieParseError:
+    """Build the parse error raised when a file can't be decoded."""
+    return SieParseError(
+        f"File is not properly encoded in {encoding}. "
+        f"According to the SIE 4B specification, SIE files must use CP437 encoding "
+        f"(IBM PC 8-bits extended ASCII). Error: {error}"
+    )
+
+
+# Read buffer for SIE files; large exports parse faster with fewer, bigger reads
+_READ_BUFFER_SIZE = 1024 * 1024
+
+
+def _open_sie(file_path: str, encoding: str) -> TextIO:
+    """Open a SIE file for parsing with a large read buffer."""
+    # Line endings are left untranslated since the parser strips every line
+    return open(file_path, 'r', encoding=encoding, newline='', buffering=_READ_BUFFER_SIZE)
+
+
+def _parse_lines(lines: Iterable[str]) -> SieFile:
+    """Parse already split SIE lines into a new SieFile."""
+    sie_file = SieFile()
+    sie_file.entries.extend(_iter_sie(lines, sie_file))
+    return sie_file
+
+
 # Main Parser Functions
 def parse_sie(file: TextIO) -> SieFile:
     """
     Parse a SIE file and return structured data.
     
     Args:
-        file: File-like object containing SIE data
+        file: File-like object containing SIE data. Lines may end in LF,
+            CRLF or a bare CR, even if the stream doesn't translate them.
         
     Returns:
         SieFile object containing parsed data
@@ -285,326 +730,40 @@ def parse_sie(file: TextIO) -> SieFile:
     Raises:
         SieParseError: If there's an error parsing the file
     """
-    sie_file = SieFile()
-    
-    # Read the file content and decode it
-    content = file.read()
-    if content.startswith('\ufeff'):  # Remove BOM if present
-        content = content[1:]
+    return _parse_lines(_split_bare_cr(file))
 
-    # Normalize tabs to spaces for consistent parsing
-    # Some SIE generators (like WintAccounting) use tabs instead of spaces
-    content = content.replace('\t', ' ')
 
-    lines = content.splitlines()
-    current_voucher = None
-    in_voucher_block = False
-    
-    # Store KTYP records for deferred processing
-    ktyp_records = {}
+def iter_entries(file_path: str, encoding: str = None,
+                 sie_file: Optional[SieFile] = None) -> Iterator[SieEntry]:
+    """
+    Iterate over the transaction entries of a SIE file without keeping them in memory.
     
-    # Store SRU records for deferred processing
-    sru_records = {}
+    Useful for large files where only aggregates are needed. All other records
+    (accounts, balances, metadata, ...) are collected into sie_file if given;
+    its entries list is left untouched. Placeholder accounts for KTYP records
+    without a matching KONTO are added once iteration has finished.
     
-    # First pass: Parse everything except KTYP dependencies
-    for line_num, line in enumerate(lines, 1):
-        line = line.strip()
-        if not line:
-            continue
-            
-        try:
-            # Handle voucher block delimiters
-            if line == '{':
-                in_voucher_block = True
-                continue
-            elif line == '}':
-                in_voucher_block = False
-                current_voucher = None  # Reset voucher when block ends
-                continue
-                
-            if not line.startswith('#'):
-                continue
-                
-            # Parse file metadata
-            if line.startswith('#FLAGGA'):
-                sie_file.file_flag = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#FORMAT'):
-                sie_file.file_format = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#SIETYP'):
-                sie_file.sie_type = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#PROGRAM'):
-                sie_file.program = _extract_quoted_value(line) or line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#GEN'):
-                sie_file.generation_date = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#FNR'):
-                sie_file.file_number = _extract_quoted_value(line) or line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#VALUTA'):
-                sie_file.currency = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#TAXAR'):
-                sie_file.tax_year = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#KPTYP'):
-                sie_file.account_plan_type = line.split(' ', 1)[1].strip() if ' ' in line else ""
-            elif line.startswith('#ADRESS'):
-                # Parse address with multiple quoted fields
-                parts = []
-                current_part = ""
-                in_quotes = False
-                i = 7  # Skip "#ADRESS"
-                while i < len(line):
-                    char = line[i]
-                    if char == '"':
-                        if in_quotes:
-                            parts.append(current_part)
-                            current_part = ""
-                            in_quotes = False
-                        else:
-                            in_quotes = True
-                    elif in_quotes:
-                        current_part += char
-                    i += 1
-                if len(parts) >= 1:
-                    sie_file.contact_person = parts[0]
-                if len(parts) >= 2:
-                    sie_file.address_line1 = parts[1]
-                if len(parts) >= 3:
-                    sie_file.address_line2 = parts[2]
-                if len(parts) >= 4:
-                    sie_file.phone = parts[3]
-            # Parse company metadata
-            elif line.startswith('#FNAMN'):
-                sie_file.company_name = _extract_quoted_value(line)
-            elif line.startswith('#ORGNR'):
-                sie_file.company_id = line.split(' ', 1)[1].strip()
-            elif line.startswith('#RAR'):
-                parts = line.split(' ')
-                if len(parts) >= 3:
-                    period = int(parts[1]) if parts[1].lstrip('-').isdigit() else 0
-                    # Only use period 0 (current year) for the main period dates
-                    if period == 0:
-                        sie_file.period_start = parts[2]
-                        sie_file.period_end = parts[3] if len(parts) > 3 else ""
-            elif line.startswith('#KONTO'):
-                # Extract account number and name, handling both quoted and unquoted names
-                parts = line.split(' ', 2)  # Split into max 3 parts
-                if len(parts) >= 3:
-                    number = parts[1].strip()
-                    name = parts[2].strip()
-                    # Remove quotes if present
-                    if name.startswith('"') and name.endswith('"'):
-                        name = name[1:-1]
-                    acc_type = get_bas_account_type(number)
-                    sie_file.accounts[number] = SieAccount(number=number, name=name, type=acc_type)
-            elif line.startswith('#KTYP'):
-                # Store KTYP records for deferred processing
-                parts = line.split()
-                if len(parts) >= 3:
-                    account_number = parts[1]
-                    account_type = parts[2]
-                    ktyp_records[account_number] = account_type
-            elif line.startswith('#SRU'):
-                # Store SRU records for deferred processing
-                parts = line.split()
-                if len(parts) >= 3:
-                    account_number = parts[1]
-                    sru_code = parts[2]
-                    sru_records[account_number] = sru_code
-            elif line.startswith('#DIM'):
-                # Parse dimension definitions
-                parts = line.split(' ', 2)
-                if len(parts) >= 3:
-                    dim_number = parts[1]
-                    dim_name = parts[2].strip()
-                    if dim_name.startswith('"') and dim_name.endswith('"'):
-                        dim_name = dim_name[1:-1]
-                    sie_file.dimensions[dim_number] = SieDimension(number=dim_number, name=dim_name)
-            elif line.startswith('#OBJEKT'):
-                # Parse object definitions
-                parts = line.split(' ', 3)
-                if len(parts) >= 4:
-                    dimension = parts[1]
-                    obj_number = parts[2]
-                    obj_name = parts[3].strip()
-                    if obj_name.startswith('"') and obj_name.endswith('"'):
-                        obj_name = obj_name[1:-1]
-                    key = f"{dimension}:{obj_number}"
-                    sie_file.objects[key] = SieObject(dimension=dimension, number=obj_number, name=obj_name)
-            elif line.startswith('#IB'):
-                # Parse opening balances
-                parts = line.split()
-                if len(parts) >= 4:
-                    period = int(parts[1])
-                    account_number = parts[2]
-                    amount = float(parts[3].replace(',', '.'))
-                    quantity = float(parts[4].replace(',', '.')) if len(parts) > 4 else 0.0
-                    sie_file.opening_balances.append(SieBalance(
-                        account_number=account_number,
-                        period=period,
-                        amount=amount,
-                        quantity=quantity
-                    ))
-            elif line.startswith('#UB'):
-                # Parse closing balances
-                parts = line.split()
-                if len(parts) >= 4:
-                    period = int(parts[1])
-                    account_number = parts[2]
-                    amount = float(parts[3].replace(',', '.'))
-                    quantity = float(parts[4].replace(',', '.')) if len(parts) > 4 else 0.0
-                    sie_file.closing_balances.append(SieBalance(
-                        account_number=account_number,
-                        period=period,
-                        amount=amount,
-                        quantity=quantity
-                    ))
-            elif line.startswith('#RES'):
-                # Parse result balances
-                parts = line.split()
-                if len(parts) >= 4:
-                    period = int(parts[1])
-                    account_number = parts[2]
-                    amount = float(parts[3].replace(',', '.'))
-                    quantity = float(parts[4].replace(',', '.')) if len(parts) > 4 else 0.0
-                    sie_file.result_balances.append(SieBalance(
-                        account_number=account_number,
-                        period=period,
-                        amount=amount,
-                        quantity=quantity
-                    ))
-            elif line.startswith('#VER'):
-                # Start of a new voucher - only set if not already in a voucher block
-                if not in_voucher_block:
-                    parts = line.split(' ')
-                    if len(parts) >= 4:
-                        # Format: #VER series verno verdate vertext [regdate]
-                        # vertext can be quoted or unquoted
-                        description = ""
-                        if len(parts) >= 5:
-                            # Check if vertext is quoted
-                            if parts[4].startswith('"') and parts[4].endswith('"'):
-                                description = parts[4][1:-1]  # Remove quotes
-                            elif parts[4].startswith('"'):
-                                # Multi-word quoted description, find the end quote
-                                desc_parts = [parts[4][1:]]  # Remove starting quote
-                                for i in range(5, len(parts)):
-                                    if parts[i].endswith('"'):
-                                        desc_parts.append(parts[i][:-1])  # Remove ending quote
-                                        break
-                                    else:
-                                        desc_parts.append(parts[i])
-                                description = ' '.join(desc_parts)
-                            else:
-                                # Unquoted single word description
-                                description = parts[4]
-                        
-                        current_voucher = {
-                            'voucher_series': parts[1],  # Series (A, B, etc.)
-                            'voucher_index': parts[2],   # V index
-                            'date': parts[3],            # Date
-                            'description': description
-                        }
-            elif line.startswith('#TRANS'):
-                # Transaction within a voucher - only process if we're in a voucher block and have a current voucher
-                if in_voucher_block and current_voucher:
-                    # Parse transaction line according to SIE specification:
-                    # Format: #TRANS account no {object list} amount transdate transtext quantity sign
-                    parts = line.split(' ', 2)  # Split into #TRANS, account, and rest
-                    if len(parts) >= 3:
-                        account_number = parts[1]
-                        rest = parts[2].strip()
-                        
-                        # Find the object list (between { and })
-                        if rest.startswith('{'):
-                            # Find the closing brace
-                            brace_end = rest.find('}')
-                            if brace_end != -1:
-                                object_list = rest[1:brace_end]  # Extract content between braces
-                                remaining = rest[brace_end + 1:].strip()
-                            else:
-                                # Malformed object list, treat as no objects
-                                object_list = ""
-                                remaining = rest
-                        else:
-                            # No object list
-                            object_list = ""
-                            remaining = rest
-                        
-                        # Parse remaining fields: amount [transdate] [transtext] [quantity] [sign]
-                        remaining_parts = remaining.split()
-                        amount = 0.0
-                        if remaining_parts:
-                            amount_str = remaining_parts[0]
-                            if amount_str and amount_str != '{}':
-                                amount = float(amount_str.replace(',', '.'))
-
-                        # Parse dimensions from object_list
-                        # Format: dimension_id "object_id" [dimension_id "object_id" ...]
-                        # Example: 6 "102" means dimension 6, object 102
-                        dimensions = {}
-                        if object_list:
-                            # Split by spaces but keep quoted strings together
-                            parts_list = []
-                            current_part = ""
-                            in_quotes = False
-                            for char in object_list:
-                                if char == '"':
-                                    in_quotes = not in_quotes
-                                elif char == ' ' and not in_quotes:
-                                    if current_part:
-                                        parts_list.append(current_part)
-                                        current_part = ""
-                                    continue
-                                current_part += char
-                            if current_part:
-                                parts_list.append(current_part)
-
-                            # Parse pairs of dimension_id and "object_id"
-                            i = 0
-                            while i < len(parts_list):
-                                if i + 1 < len(parts_list):
-                                    dim_id = parts_list[i]
-                                    obj_id = parts_list[i + 1].strip('"')
-                                    dimensions[dim_id] = obj_id
-                                    i += 2
-                                else:
-                                    break
-
-                        # Create entry with dimensions
-                        entry = SieEntry(
-                            date=current_voucher['date'],
-                            account_number=account_number,
-                            amount=amount,
-                            description=current_voucher['description'],
-                            voucher_index=f"{current_voucher['voucher_series']}{current_voucher['voucher_index']}",
-                            dimensions=dimensions
-                        )
-                        sie_file.entries.append(entry)
-                        
-        except (ValueError, IndexError) as e:
-            raise SieParseError(f"Error parsing line: {str(e)}", line_num, line)
-    
-    # Second pass: Apply KTYP records to existing accounts
-    for account_number, account_type_code in ktyp_records.items():
-        try:
-            account_type = AccountType.from_sie_code(account_type_code)
-            if account_number in sie_file.accounts:
-                sie_file.accounts[account_number].type = account_type
-            else:
-                # Create a placeholder account if KTYP comes before KONTO
-                sie_file.accounts[account_number] = SieAccount(
-                    number=account_number, 
-                    name=f"Account {account_number}",  # Placeholder name
-                    type=account_type
-                )
-        except ValueError as e:
-            raise SieParseError(f"Invalid account type in KTYP: {e}", line_num=None, line_content=f"#KTYP {account_number} {account_type_code}")
-    
-    # Third pass: Apply SRU records to existing accounts
-    for account_number, sru_code in sru_records.items():
-        if account_number in sie_file.accounts:
-            sie_file.accounts[account_number].sru_code = sru_code
-        # Note: We don't create accounts for SRU-only records as they should have KONTO records
+    Args:
+        file_path: Path to the SIE file
+        encoding: File encoding (default: 'cp437' as per SIE specification)
+        sie_file: Optional SieFile to receive the non-entry records
+        
+    Yields:
+        SieEntry objects in file order
+        
+    Raises:
+        SieParseError: If there's an error parsing the file
+        FileNotFoundError: If the file doesn't exist
+    """
+    encoding_to_use = encoding or 'cp437'
+    if sie_file is None:
+        sie_file = SieFile()
     
-    return sie_file
+    try:
+        with _open_sie(file_path, encoding_to_use) as f:
+            yield from _iter_sie(f, sie_file)
+    except UnicodeDecodeError as e:
+        raise _encoding_error(encoding_to_use, e)
 
 
 def parse_sie_file(file_path: str, encoding: str = None) -> SieFile:
@@ -631,14 +790,11 @@ def parse_sie_file(file_path: str, encoding: str = None) -> SieFile:
     encoding_to_use = encoding or 'cp437'
     
     try:
-        with open(file_path, 'r', encoding=encoding_to_use) as f:
-            return parse_sie(f)
+        # newline='' already splits bare CRs, so skip parse_sie's extra check
+        with _open_sie(file_path, encoding_to_use) as f:
+            return _parse_lines(f)
     except UnicodeDecodeError as e:
-        raise SieParseError(
-            f"File is not properly encoded in {encoding_to_use}. "
-            f"According to the SIE 4B specification, SIE files must use CP437 encoding "
-            f"(IBM PC 8-bits extended ASCII). Error: {e}"
-        )
+        raise _encoding_error(encoding_to_use, e)
 
 
 # Validation Functions
@@ -672,10 +828,12 @@ __all__ = [
     # Main parsing functions
     "parse_sie",
     "parse_sie_file",
+    "iter_entries",
     # Data models
     "SieFile",
     "SieAccount",
     "SieEntry",
+    "SieVoucher",
     "SieBalance",
     "SieDimension",
     "SieObject",
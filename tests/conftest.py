@@ -0,0 +1,83 @@
+"""Shared fixtures for the SIE parser test suite."""
+
+import os
+from collections import defaultdict
+from operator import attrgetter
+
+import pytest
+
+import sie_parser
+
+_TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_TEST_SIE4 = os.path.join(_TESTS_DIR, 'test_sie4.se')
+_OFFICIAL_EXAMPLE = os.path.join(_TESTS_DIR, '..', 'SIE4 spec', 'SIE4 Exempelfil.SE')
+
+
+@pytest.fixture(scope="session")
+def sie4_path():
+    """Path to tests/test_sie4.se, skipping the requesting test if it is missing."""
+    if not os.path.exists(_TEST_SIE4):
+        pytest.skip("Test SIE file not found")
+    return _TEST_SIE4
+
+
+@pytest.fixture(scope="session")
+def official_example_path():
+    """Path to the official SIE4 example file, skipping the requesting test if it is missing."""
+    if not os.path.exists(_OFFICIAL_EXAMPLE):
+        pytest.skip("Official SIE4 example file not found")
+    return _OFFICIAL_EXAMPLE
+
+
+@pytest.fixture(scope="session")
+def parsed_test_sie4(sie4_path):
+    """Parse tests/test_sie4.se once per session.
+
+    The parsed SieFile is shared between tests, so they must not modify it.
+    """
+    return sie_parser.parse_sie_file(sie4_path)
+
+
+@pytest.fixture(scope="session")
+def parsed_official_example(official_example_path):
+    """Parse the official SIE4 example file once per session.
+
+    The parsed SieFile is shared between tests, so they must not modify it.
+    """
+    return sie_parser.parse_sie_file(official_example_path)
+
+
+def _group_entries(entries, key):
+    """Group entries by key(entry), keeping file order within each group."""
+    groups = defaultdict(list)
+    for entry in entries:
+        groups[key(entry)].append(entry)
+    return dict(groups)
+
+
+_VOUCHER = attrgetter('voucher_index')
+_VOUCHER_ACCOUNT = attrgetter('voucher_index', 'account_number')
+
+
+@pytest.fixture(scope="session")
+def sie4_entries_by_voucher(parsed_test_sie4):
+    """Entries of tests/test_sie4.se keyed by voucher index."""
+    return _group_entries(parsed_test_sie4.entries, _VOUCHER)
+
+
+@pytest.fixture(scope="session")
+def sie4_entries_by_voucher_account(parsed_test_sie4):
+    """Entries of tests/test_sie4.se keyed by (voucher index, account number)."""
+    return _group_entries(parsed_test_sie4.entries, _VOUCHER_ACCOUNT)
+
+
+@pytest.fixture(scope="session")
+def official_example_entries_by_voucher(parsed_official_example):
+    """Entries of the official SIE4 example file keyed by voucher index."""
+    return _group_entries(parsed_official_example.entries, _VOUCHER)
+
+
+@pytest.fixture(scope="session")
+def official_example_entries_by_voucher_account(parsed_official_example):
+    """Entries of the official SIE4 example file keyed by (voucher index, account number)."""
+    return _group_entries(parsed_official_example.entries, _VOUCHER_ACCOUNT)
@@ -4,21 +4,17 @@ These tests ensure the CLI commands work correctly and catch regressions
 during refactoring.
 """
 
+import dataclasses
 import pytest
-import sys
-import os
+import types
 from io import StringIO
-from unittest.mock import patch, MagicMock
-
-# Add the parent directory to the path so we can import modules
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from unittest.mock import ANY, MagicMock
 
 import sie_cli
 import sie_parser
 
 
-@pytest.fixture
-def sample_sie_data():
+def _build_sample_sie_data():
     """Create a sample SieFile object for testing."""
     sie_data = sie_parser.SieFile()
     sie_data.company_name = "Test Company AB"
@@ -61,50 +57,108 @@ def sample_sie_data():
     return sie_data
 
 
+@pytest.fixture(scope="session")
+def _sample_sie_data_master():
+    """Create a read-only sample SieFile once for the whole test session.
+
+    Its containers are replaced with read-only views, so a test that tries to
+    modify the shared object fails with TypeError instead of leaking changes.
+    """
+    sie_data = _build_sample_sie_data()
+    sie_data.accounts = types.MappingProxyType(sie_data.accounts)
+    sie_data.entries = tuple(sie_data.entries)
+    sie_data.opening_balances = tuple(sie_data.opening_balances)
+    return sie_data
+
+
+@pytest.fixture
+def sample_sie_data(request, _sample_sie_data_master):
+    """Provide the sample SieFile, freshly built for tests marked as mutating it."""
+    if request.node.get_closest_marker("mutates"):
+        return _build_sample_sie_data()
+    return _sample_sie_data_master
+
+
+def assert_contains_all(output, expected):
+    """Assert that output contains every string in expected."""
+    missing = [text for text in expected if text not in output]
+    assert not missing, missing
+
+
+# Expected fragments of the table output for the sample data
+EXPECTED_ACCOUNTS_TABLE = (
+    # Header
+    "Account", "Name", "Type", "Balance",
+    # Account data
+    "1910", "Kassa", "ASSET", "2610", "Leverantörsskulder", "LIABILITY",
+    # Total count
+    "Total accounts: 4",
+)
+
+EXPECTED_VOUCHERS_TABLE = (
+    # Header
+    "Voucher", "Date", "Description", "Trans", "Balance",
+    # Voucher data
+    "A1", "A2", "20240315", "20240316",
+    # Summary
+    "Total vouchers:", "Balanced vouchers:",
+)
+
+EXPECTED_SUMMARY = (
+    # Main sections
+    "SIE File Summary", "Company Information:", "Contact Information:",
+    "File Information:", "Data Summary:",
+    # Company info
+    "Test Company AB", "555555-5555", "20240101 - 20241231",
+    # Contact info
+    "Test Person", "Test Street 1", "08-123 45 67",
+    # File info
+    "PC8", "Test Program",
+    # Data summary
+    "Total Accounts: 4", "Total Transactions: 5", "Total Vouchers: 2",
+)
+
+
+@pytest.fixture
+def cli_invocation(monkeypatch, capsys):
+    """Return a function that runs sie_cli.main() with the given arguments.
+
+    The function returns everything main() wrote to stdout. Output goes
+    through capsys, so stderr stays available via capsys.readouterr().
+    """
+    def _invoke(*args):
+        monkeypatch.setattr('sys.argv', ['sie_cli.py', *args])
+        sie_cli.main()
+        return capsys.readouterr().out
+    return _invoke
+
+
 class TestListAccounts:
     """Test the list_accounts function."""
     
-    def test_list_accounts_basic_output(self, sample_sie_data, capsys):
+    def test_list_accounts_basic_output(self, sample_sie_data):
         """Test basic accounts listing output."""
-        sie_cli.list_accounts(sample_sie_data, non_zero_only=False, csv_output=False)
-        
-        captured = capsys.readouterr()
-        output = captured.out
+        buf = StringIO()
+        sie_cli.list_accounts(sample_sie_data, non_zero_only=False, csv_output=False, out=buf)
+        output = buf.getvalue()
         
-        # Check header
-        assert "Account" in output
-        assert "Name" in output
-        assert "Type" in output
-        assert "Balance" in output
-        
-        # Check account data
-        assert "1910" in output
-        assert "Kassa" in output
-        assert "ASSET" in output
-        assert "2610" in output
-        assert "Leverantörsskulder" in output
-        assert "LIABILITY" in output
-        
-        # Check total count
-        assert "Total accounts: 4" in output
+        assert_contains_all(output, EXPECTED_ACCOUNTS_TABLE)
     
-    def test_list_accounts_non_zero_filter(self, sample_sie_data, capsys):
+    def test_list_accounts_non_zero_filter(self, sample_sie_data):
         """Test accounts listing with non-zero filter."""
-        sie_cli.list_accounts(sample_sie_data, non_zero_only=True, csv_output=False)
-        
-        captured = capsys.readouterr()
-        output = captured.out
+        buf = StringIO()
+        sie_cli.list_accounts(sample_sie_data, non_zero_only=True, csv_output=False, out=buf)
+        output = buf.getvalue()
         
         # Should show fewer accounts (only those with balances)
         assert "Total accounts:" in output
         # The exact count depends on which accounts have non-zero balances
         
-    def test_list_accounts_csv_output(self, sample_sie_data, capsys):
+    def test_list_accounts_csv_output(self, sample_sie_data):
         """Test accounts listing with CSV output."""
-        sie_cli.list_accounts(sample_sie_data, non_zero_only=False, csv_output=True)
-        
-        captured = capsys.readouterr()
-        output = captured.out
+        buf = StringIO()
+        sie_cli.list_accounts(sample_sie_data, non_zero_only=False, csv_output=True, out=buf)
+        output = buf.getvalue()
         
         # Check CSV header
         assert "number,name,type,balance,normal_balance,sru_code" in output
@@ -117,40 +171,35 @@ class TestListAccounts:
         assert "1910,Kassa,ASSET," in output
         assert "3010,Försäljning,INCOME," in output and "3001" in output  # SRU code
 
+    @pytest.mark.mutates
+    def test_list_accounts_numeric_sort(self, sample_sie_data):
+        """Test that account numbers of different lengths sort numerically."""
+        sample_sie_data.accounts["10000"] = sie_parser.SieAccount("10000", "Extra", sie_parser.AccountType.ASSET)
+        sample_sie_data.accounts["999"] = sie_parser.SieAccount("999", "Short", sie_parser.AccountType.EXPENSE)
+        buf = StringIO()
+        sie_cli.list_accounts(sample_sie_data, non_zero_only=False, csv_output=True, out=buf)
+
+        lines = buf.getvalue().strip().split('\n')[1:]
+        numbers = [line.split(',')[0] for line in lines]
+        assert numbers == ["999", "1910", "2610", "3010", "4010", "10000"]
+
 
 class TestListVouchers:
     """Test the list_vouchers function."""
     
-    def test_list_vouchers_basic_output(self, sample_sie_data, capsys):
+    def test_list_vouchers_basic_output(self, sample_sie_data):
         """Test basic vouchers listing output."""
-        sie_cli.list_vouchers(sample_sie_data, csv_output=False)
-        
-        captured = capsys.readouterr()
-        output = captured.out
-        
-        # Check header
-        assert "Voucher" in output
-        assert "Date" in output
-        assert "Description" in output
-        assert "Trans" in output
-        assert "Balance" in output
+        buf = StringIO()
+        sie_cli.list_vouchers(sample_sie_data, csv_output=False, out=buf)
+        output = buf.getvalue()
         
-        # Check voucher data
-        assert "A1" in output
-        assert "A2" in output
-        assert "20240315" in output
-        assert "20240316" in output
-        
-        # Check summary
-        assert "Total vouchers:" in output
-        assert "Balanced vouchers:" in output
+        assert_contains_all(output, EXPECTED_VOUCHERS_TABLE)
     
-    def test_list_vouchers_csv_output(self, sample_sie_data, capsys):
+    def test_list_vouchers_csv_output(self, sample_sie_data):
         """Test vouchers listing with CSV output."""
-        sie_cli.list_vouchers(sample_sie_data, csv_output=True)
-        
-        captured = capsys.readouterr()
-        output = captured.out
+        buf = StringIO()
+        sie_cli.list_vouchers(sample_sie_data, csv_output=True, out=buf)
+        output = buf.getvalue()
         
         # Check CSV header
         assert "voucher,date,description,transactions,total_amount,balance,balanced" in output
@@ -163,49 +212,49 @@ class TestListVouchers:
         assert "A1,20240315," in output
         assert "A2,20240316," in output
 
+    @pytest.mark.mutates
+    def test_list_vouchers_exact_balance(self, sample_sie_data):
+        """Test that float rounding noise doesn't leak into voucher balances."""
+        sample_sie_data.entries = [
+            sie_parser.SieEntry("20240317", "1910", 0.1, "Rounding", "A3"),
+            sie_parser.SieEntry("20240317", "1910", 0.2, "Rounding", "A3"),
+            sie_parser.SieEntry("20240317", "4010", -0.3, "Rounding", "A3"),
+        ]
+        buf = StringIO()
+        sie_cli.list_vouchers(sample_sie_data, csv_output=True, out=buf)
+
+        output = buf.getvalue()
+        assert "A3,20240317,Rounding,3,0.6,0.0,Yes" in output
+
+    @pytest.mark.mutates
+    def test_list_vouchers_uses_voucher_header(self, sample_sie_data):
+        """Test that the #VER header supplies date and description when present."""
+        sample_sie_data.vouchers = {"A1": sie_parser.SieVoucher("A", "1", "20240401", "Header text")}
+        buf = StringIO()
+        sie_cli.list_vouchers(sample_sie_data, csv_output=True, out=buf)
+
+        output = buf.getvalue()
+        assert "A1,20240401,Header text,3," in output
+        # A2 has no header and falls back to its first entry
+        assert "A2,20240316,Test transaction 2,2," in output
+
 
 class TestShowSummary:
     """Test the show_summary function."""
     
-    def test_show_summary_basic_output(self, sample_sie_data, capsys):
+    def test_show_summary_basic_output(self, sample_sie_data):
         """Test basic summary output."""
-        sie_cli.show_summary(sample_sie_data, csv_output=False)
-        
-        captured = capsys.readouterr()
-        output = captured.out
-        
-        # Check main sections
-        assert "SIE File Summary" in output
-        assert "Company Information:" in output
-        assert "Contact Information:" in output
-        assert "File Information:" in output
-        assert "Data Summary:" in output
-        
-        # Check company info
-        assert "Test Company AB" in output
-        assert "555555-5555" in output
-        assert "20240101 - 20241231" in output
+        buf = StringIO()
+        sie_cli.show_summary(sample_sie_data, csv_output=False, out=buf)
+        output = buf.getvalue()
         
-        # Check contact info
-        assert "Test Person" in output
-        assert "Test Street 1" in output
-        assert "08-123 45 67" in output
-        
-        # Check file info
-        assert "PC8" in output
-        assert "Test Program" in output
-        
-        # Check data summary
-        assert "Total Accounts: 4" in output
-        assert "Total Transactions: 5" in output
-        assert "Total Vouchers: 2" in output
+        assert_contains_all(output, EXPECTED_SUMMARY)
     
-    def test_show_summary_csv_output(self, sample_sie_data, capsys):
+    def test_show_summary_csv_output(self, sample_sie_data):
         """Test summary with CSV output."""
-        sie_cli.show_summary(sample_sie_data, csv_output=True)
-        
-        captured = capsys.readouterr()
-        output = captured.out
+        buf = StringIO()
+        sie_cli.show_summary(sample_sie_data, csv_output=True, out=buf)
+        output = buf.getvalue()
         
         # Check CSV header contains expected fields
         assert "company_name" in output
@@ -225,109 +274,70 @@ class TestShowSummary:
 class TestCLIMain:
     """Test the main CLI function and argument parsing."""
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_accounts_command(self, mock_parse, sample_sie_data):
-        """Test main function with accounts command."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'accounts', 'test.sie']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
-        
-        mock_parse.assert_called_once_with('test.sie', encoding='cp437')
-        output = mock_stdout.getvalue()
-        assert "Account" in output
-        assert "Total accounts:" in output
+    @pytest.fixture(autouse=True)
+    def _mock_parse(self, sample_sie_data, monkeypatch):
+        """Replace iter_entries with a mock streaming the sample data."""
+        def fake_iter_entries(file_path, encoding=None, sie_file=None):
+            # Like iter_entries, fill sie_file with the non-entry records
+            for field in dataclasses.fields(sie_parser.SieFile):
+                if field.name != 'entries':
+                    setattr(sie_file, field.name, getattr(sample_sie_data, field.name))
+            return iter(sample_sie_data.entries)
+        
+        self.mock_parse = MagicMock(side_effect=fake_iter_entries)
+        monkeypatch.setattr('sie_cli.sie_parser.iter_entries', self.mock_parse)
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_vouchers_command(self, mock_parse, sample_sie_data):
-        """Test main function with vouchers command."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'vouchers', 'test.sie']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
-        
-        mock_parse.assert_called_once_with('test.sie', encoding='cp437')
-        output = mock_stdout.getvalue()
-        assert "Voucher" in output
-        assert "Total vouchers:" in output
+    @pytest.mark.parametrize("command,expected", [
+        ("accounts", ("Account", "Total accounts:")),
+        ("vouchers", ("Voucher", "Total vouchers:")),
+        ("summary", ("SIE File Summary", "Company Information:", "Total Transactions: 5")),
+    ], ids=["accounts", "vouchers", "summary"])
+    def test_main_commands(self, cli_invocation, command, expected):
+        """Test main function with each command."""
+        output = cli_invocation(command, 'test.sie')
+        
+        self.mock_parse.assert_called_once_with('test.sie', encoding='cp437', sie_file=ANY)
+        assert_contains_all(output, expected)
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_summary_command(self, mock_parse, sample_sie_data):
-        """Test main function with summary command."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'summary', 'test.sie']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
-        
-        mock_parse.assert_called_once_with('test.sie', encoding='cp437')
-        output = mock_stdout.getvalue()
-        assert "SIE File Summary" in output
-        assert "Company Information:" in output
-    
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_with_csv_flag(self, mock_parse, sample_sie_data):
+    def test_main_with_csv_flag(self, cli_invocation):
         """Test main function with CSV output flag."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'accounts', 'test.sie', '--csv']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
+        output = cli_invocation('accounts', 'test.sie', '--csv')
         
-        output = mock_stdout.getvalue()
         assert "number,name,type,balance" in output
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_with_non_zero_flag(self, mock_parse, sample_sie_data):
+    def test_main_with_non_zero_flag(self, cli_invocation):
         """Test main function with non-zero flag."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'accounts', 'test.sie', '--non-zero']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
+        cli_invocation('accounts', 'test.sie', '--non-zero')
         
         # Should execute without error
-        mock_parse.assert_called_once()
+        self.mock_parse.assert_called_once()
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_with_custom_encoding(self, mock_parse, sample_sie_data):
+    def test_main_with_custom_encoding(self, cli_invocation):
         """Test main function with custom encoding."""
-        mock_parse.return_value = sample_sie_data
-        
-        with patch('sys.argv', ['sie_cli.py', 'summary', 'test.sie', '--encoding', 'utf-8']):
-            with patch('sys.stdout', new_callable=StringIO):
-                sie_cli.main()
+        cli_invocation('summary', 'test.sie', '--encoding', 'utf-8')
         
-        mock_parse.assert_called_once_with('test.sie', encoding='utf-8')
+        self.mock_parse.assert_called_once_with('test.sie', encoding='utf-8', sie_file=ANY)
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_file_not_found_error(self, mock_parse):
+    def test_main_file_not_found_error(self, cli_invocation, capsys):
         """Test main function handles file not found error."""
-        mock_parse.side_effect = FileNotFoundError("File not found")
+        self.mock_parse.side_effect = FileNotFoundError("File not found")
         
-        with patch('sys.argv', ['sie_cli.py', 'summary', 'nonexistent.sie']):
-            with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
-                with pytest.raises(SystemExit) as exc_info:
-                    sie_cli.main()
+        with pytest.raises(SystemExit) as exc_info:
+            cli_invocation('summary', 'nonexistent.sie')
         
         assert exc_info.value.code == 1
-        error_output = mock_stderr.getvalue()
+        error_output = capsys.readouterr().err
         assert "File 'nonexistent.sie' not found" in error_output
     
-    @patch('sie_cli.sie_parser.parse_sie_file')
-    def test_main_parse_error(self, mock_parse):
+    def test_main_parse_error(self, cli_invocation, capsys):
         """Test main function handles parse errors."""
-        mock_parse.side_effect = sie_parser.SieParseError("Invalid SIE format", 5, "bad line")
+        self.mock_parse.side_effect = sie_parser.SieParseError("Invalid SIE format", 5, "bad line")
         
-        with patch('sys.argv', ['sie_cli.py', 'summary', 'bad.sie']):
-            with patch('sys.stderr', new_callable=StringIO) as mock_stderr:
-                with pytest.raises(SystemExit) as exc_info:
-                    sie_cli.main()
+        with pytest.raises(SystemExit) as exc_info:
+            cli_invocation('summary', 'bad.sie')
         
         assert exc_info.value.code == 1
-        error_output = mock_stderr.getvalue()
+        error_output = capsys.readouterr().err
         assert "Error parsing SIE file:" in error_output
         assert "Invalid SIE format" in error_output
 
@@ -335,40 +345,20 @@ class TestCLIMain:
 class TestCLIIntegration:
     """Integration tests using real test files."""
     
-    def test_cli_with_real_test_file(self):
+    @pytest.mark.parametrize("command,kwargs,expected", [
+        (sie_cli.show_summary, {}, ["SIE File Summary", "Testföretag AB"]),
+        (sie_cli.list_accounts, {"non_zero_only": True}, ["Account", "Total accounts:"]),
+        (sie_cli.list_vouchers, {}, ["Voucher", "Total vouchers:"]),
+    ], ids=["summary", "accounts", "vouchers"])
+    def test_cli_with_real_test_file(self, parsed_test_sie4, command, kwargs, expected):
         """Test CLI commands with the actual test SIE file."""
-        test_file_path = os.path.join(os.path.dirname(__file__), 'test_sie4.se')
-        
-        if not os.path.exists(test_file_path):
-            pytest.skip("Test SIE file not found")
-        
-        # Test summary command
-        with patch('sys.argv', ['sie_cli.py', 'summary', test_file_path]):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
+        buf = StringIO()
+        command(parsed_test_sie4, csv_output=False, out=buf, **kwargs)
         
-        summary_output = mock_stdout.getvalue()
+        assert_contains_all(buf.getvalue(), expected)
+    
+    def test_main_with_real_test_file(self, cli_invocation, sie4_path):
+        """Test that main() parses and summarizes the actual test SIE file."""
+        summary_output = cli_invocation('summary', sie4_path)
         assert "SIE File Summary" in summary_output
         assert "Testföretag AB" in summary_output
-        
-        # Test accounts command
-        with patch('sys.argv', ['sie_cli.py', 'accounts', test_file_path, '--non-zero']):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
-        
-        accounts_output = mock_stdout.getvalue()
-        assert "Account" in accounts_output
-        assert "Total accounts:" in accounts_output
-        
-        # Test vouchers command
-        with patch('sys.argv', ['sie_cli.py', 'vouchers', test_file_path]):
-            with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
-                sie_cli.main()
-        
-        vouchers_output = mock_stdout.getvalue()
-        assert "Voucher" in vouchers_output
-        assert "Total vouchers:" in vouchers_output
-
-
-if __name__ == "__main__":
-    pytest.main([__file__]) 
\ No newline at end of file
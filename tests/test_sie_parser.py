@@ -4,20 +4,15 @@ This test suite validates the SIE parser's compliance with the SIE 4B specificat
 and ensures compatibility with real-world SIE files.
 """
 
+import math
 import pytest
 from io import StringIO
-import sys
-import os
-
-# Add the parent directory to the path so we can import sie_parser
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import sie_parser
 
 
-def test_parse_simple_sie():
-    """Test basic SIE parsing functionality with minimal valid file."""
-    sie_content = '''#FLAGGA 1
+# Minimal valid file exercising metadata, accounts and a voucher
+_SIMPLE_SIE = '''#FLAGGA 1
 #FORMAT PC8
 #SIETYP 4
 #FNAMN "Test Company AB"
@@ -30,9 +25,57 @@ def test_parse_simple_sie():
    #TRANS 1910 {} 1000.00
 }
 '''
-    
-    file_obj = StringIO(sie_content)
-    result = sie_parser.parse_sie(file_obj)
+
+# Opening balance with an amount that isn't a number
+_INVALID_AMOUNT_SIE = '''#FLAGGA 1
+#IB 0 1910 invalid_amount
+'''
+
+# Account type override with an unknown code
+_INVALID_KTYP_SIE = '''#KONTO 1910 "Kassa"
+#KTYP 1910 X
+'''
+
+# Written in each tested encoding by the encoded_test_files fixture
+_ENCODING_TEST_SIE = '''#FLAGGA 0
+#FORMAT PC8
+#SIETYP 4
+#FNAMN "Test Company AB"
+#KONTO 1910 "Kassa"
+'''
+
+# Header-only file declaring the mandated PC8 format
+_FORMAT_PC8_SIE = '''#FLAGGA 0
+#FORMAT PC8
+#SIETYP 4
+#KONTO 1910 "Kassa"
+'''
+
+# Single voucher whose transaction lines sum to zero
+_BALANCED_VOUCHER_SIE = '''#FLAGGA 0
+#FORMAT PC8
+#SIETYP 4
+#KONTO 1910 "Kassa"
+#KONTO 2640 "VAT"
+#KONTO 4010 "Expenses"
+#VER A 1 20240315 "Test verification"
+{
+#TRANS 1910 {} -1000.00
+#TRANS 2640 {} 200.00
+#TRANS 4010 {} 800.00
+}
+'''
+
+
+@pytest.fixture(scope="module")
+def simple_sie_result():
+    """Parse _SIMPLE_SIE once for the module."""
+    return sie_parser.parse_sie(StringIO(_SIMPLE_SIE))
+
+
+def test_parse_simple_sie(simple_sie_result):
+    """Test basic SIE parsing functionality with minimal valid file."""
+    result = simple_sie_result
     
     assert result.company_name == "Test Company AB"
     assert result.company_id == "555555-5555"
@@ -44,49 +87,55 @@ def test_parse_simple_sie():
     assert result.entries[0].amount == 1000.0
 
 
-def test_account_type_detection():
+@pytest.mark.parametrize("number,expected", [
+    ("1910", sie_parser.AccountType.ASSET),
+    ("2440", sie_parser.AccountType.LIABILITY),
+    ("3010", sie_parser.AccountType.INCOME),
+    ("4010", sie_parser.AccountType.EXPENSE),
+    ("8010", sie_parser.AccountType.INCOME),
+])
+def test_account_type_detection(number, expected):
     """Test BAS account plan type detection for Swedish standard accounts."""
-    assert sie_parser.get_bas_account_type("1910") == sie_parser.AccountType.ASSET
-    assert sie_parser.get_bas_account_type("2440") == sie_parser.AccountType.LIABILITY
-    assert sie_parser.get_bas_account_type("3010") == sie_parser.AccountType.INCOME
-    assert sie_parser.get_bas_account_type("4010") == sie_parser.AccountType.EXPENSE
-    assert sie_parser.get_bas_account_type("8010") == sie_parser.AccountType.INCOME
+    assert sie_parser.get_bas_account_type(number) == expected
 
 
-def test_account_balance_properties():
-    """Test that account types have correct normal balance and multiplier properties."""
+@pytest.mark.parametrize("number,name,account_type,normal_balance,multiplier", [
     # Debit accounts (assets and expenses)
-    asset_account = sie_parser.SieAccount(number="1910", name="Kassa", type=sie_parser.AccountType.ASSET)
-    expense_account = sie_parser.SieAccount(number="4010", name="Kostnader", type=sie_parser.AccountType.EXPENSE)
-    
-    assert asset_account.normal_balance == "debit"
-    assert asset_account.balance_multiplier == 1
-    assert expense_account.normal_balance == "debit"
-    assert expense_account.balance_multiplier == 1
-    
+    ("1910", "Kassa", sie_parser.AccountType.ASSET, "debit", 1),
+    ("4010", "Kostnader", sie_parser.AccountType.EXPENSE, "debit", 1),
     # Credit accounts (liabilities and income)
-    liability_account = sie_parser.SieAccount(number="2610", name="Leverantörsskulder", type=sie_parser.AccountType.LIABILITY)
-    income_account = sie_parser.SieAccount(number="3010", name="Försäljning", type=sie_parser.AccountType.INCOME)
+    ("2610", "Leverantörsskulder", sie_parser.AccountType.LIABILITY, "credit", -1),
+    ("3010", "Försäljning", sie_parser.AccountType.INCOME, "credit", -1),
+])
+def test_account_balance_properties(number, name, account_type, normal_balance, multiplier):
+    """Test that account types have correct normal balance and multiplier properties."""
+    account = sie_parser.SieAccount(number=number, name=name, type=account_type)
     
-    assert liability_account.normal_balance == "credit"
-    assert liability_account.balance_multiplier == -1
-    assert income_account.normal_balance == "credit"
-    assert income_account.balance_multiplier == -1
+    assert account.normal_balance == normal_balance
+    assert account.balance_multiplier == multiplier
 
 
 def test_parse_error():
     """Test that malformed SIE content raises appropriate parse errors."""
-    sie_content = '''#FLAGGA 1
-#IB 0 1910 invalid_amount
-'''
-    
-    file_obj = StringIO(sie_content)
+    file_obj = StringIO(_INVALID_AMOUNT_SIE)
     with pytest.raises(sie_parser.SieParseError) as exc_info:
         sie_parser.parse_sie(file_obj)
     
     assert "Line 2" in str(exc_info.value)
 
 
+def test_cr_line_endings(simple_sie_result):
+    """Test that CR-only line endings are split even by a non-translating StringIO."""
+    result = sie_parser.parse_sie(StringIO(_SIMPLE_SIE.replace('\n', '\r')))
+    
+    assert result == simple_sie_result
+    
+    with pytest.raises(sie_parser.SieParseError) as exc_info:
+        sie_parser.parse_sie(StringIO(_INVALID_AMOUNT_SIE.replace('\n', '\r')))
+    
+    assert "Line 2" in str(exc_info.value)
+
+
 def test_empty_file():
     """Test that empty files are handled gracefully without errors."""
     file_obj = StringIO("")
@@ -97,14 +146,13 @@ def test_empty_file():
     assert len(result.entries) == 0
 
 
-def test_ktyp_override():
+def test_ktyp_override(parsed_test_sie4):
     """Test that KTYP records override BAS account types regardless of declaration order.
     
     This is critical because SIE files don't guarantee KTYP comes after KONTO records,
     so the parser must handle deferred processing.
     """
-    test_file_path = os.path.join(os.path.dirname(__file__), 'test_sie4.se')
-    result = sie_parser.parse_sie_file(test_file_path)
+    result = parsed_test_sie4
     
     # Account 1510 - KTYP before KONTO definition
     assert result.accounts['1510'].type == sie_parser.AccountType.INCOME
@@ -117,37 +165,47 @@ def test_ktyp_override():
     assert result.accounts['2610'].type == sie_parser.AccountType.LIABILITY
 
 
-def test_voucher_scope_handling():
+def test_ktyp_invalid_code():
+    """Test that an unknown KTYP code is reported at the offending line."""
+    with pytest.raises(sie_parser.SieParseError) as exc_info:
+        sie_parser.parse_sie(StringIO(_INVALID_KTYP_SIE))
+
+    assert "Line 2" in str(exc_info.value)
+    assert "Unknown SIE account type code: X" in str(exc_info.value)
+
+
+def test_voucher_scope_handling(sie4_entries_by_voucher, sie4_entries_by_voucher_account):
     """Test that transactions are only processed within voucher blocks.
     
     This prevents the bug where all transactions get associated with the first voucher
     when voucher scope isn't properly tracked.
     """
-    test_file_path = os.path.join(os.path.dirname(__file__), 'test_sie4.se')
-    result = sie_parser.parse_sie_file(test_file_path)
+    by_voucher = sie4_entries_by_voucher
     
-    # Verify we have multiple distinct vouchers
-    voucher_indices = {e.voucher_index for e in result.entries if e.voucher_index}
-    assert len(voucher_indices) > 1
+    # Verify every entry belongs to a voucher and there are several of them
+    assert None not in by_voucher
+    assert len(by_voucher) > 1
     
     # Test specific voucher grouping
-    voucher_a1_entries = [e for e in result.entries if e.voucher_index == "A1"]
+    voucher_a1_entries = by_voucher["A1"]
     assert len(voucher_a1_entries) == 3
     
     # Verify transaction amounts within voucher
-    kassa_entry = next((e for e in voucher_a1_entries if e.account_number == "1910"), None)
-    assert kassa_entry is not None
+    [kassa_entry] = sie4_entries_by_voucher_account[("A1", "1910")]
     assert kassa_entry.amount == -1000.0
+    
+    # Every voucher balances (the file only uses whole-krona amounts, so exactly)
+    for entries in by_voucher.values():
+        assert math.fsum(e.amount for e in entries) == 0.0
 
 
-def test_comprehensive_file_parsing():
+def test_comprehensive_file_parsing(parsed_test_sie4):
     """Test parsing a comprehensive SIE file with all major features.
     
     This validates the parser handles real-world complexity including metadata,
     addresses, dimensions, balances, and complex transactions.
     """
-    test_file_path = os.path.join(os.path.dirname(__file__), 'test_sie4.se')
-    result = sie_parser.parse_sie_file(test_file_path)
+    result = parsed_test_sie4
     
     # Company information
     assert result.company_name == "Testföretag AB"
@@ -172,18 +230,30 @@ def test_comprehensive_file_parsing():
     assert len(result.entries) > 0
 
 
-def test_official_sie4_example_file():
+def test_iter_entries_streaming(sie4_path, parsed_test_sie4):
+    """Test that iter_entries yields the same entries as a full parse.
+
+    Non-entry records go to the supplied SieFile, whose entries list stays empty.
+    """
+    sie_file = sie_parser.SieFile()
+    entries = list(sie_parser.iter_entries(sie4_path, sie_file=sie_file))
+
+    assert entries == parsed_test_sie4.entries
+    assert sie_file.entries == []
+    assert sie_file.company_name == parsed_test_sie4.company_name
+    assert sie_file.accounts == parsed_test_sie4.accounts
+    assert sie_file.opening_balances == parsed_test_sie4.opening_balances
+
+
+@pytest.mark.slow
+def test_official_sie4_example_file(parsed_official_example, official_example_entries_by_voucher,
+                                    official_example_entries_by_voucher_account):
     """Test parsing the official SIE4 example file to validate real-world compatibility.
     
     This is the ultimate test - if we can parse the official example correctly,
     we should handle most real SIE files.
     """
-    example_file_path = os.path.join(os.path.dirname(__file__), '..', 'SIE4 spec', 'SIE4 Exempelfil.SE')
-    
-    if not os.path.exists(example_file_path):
-        pytest.skip("Official SIE4 example file not found")
-    
-    result = sie_parser.parse_sie_file(example_file_path)
+    result = parsed_official_example
     
     # Basic file validation
     assert result.company_name == "Övningsbolaget AB"
@@ -217,22 +287,21 @@ def test_official_sie4_example_file():
     assert cash_balance.amount == 1339.00
     
     # Transaction validation
-    a1_entries = [e for e in result.entries if e.voucher_index == "A1"]
+    a1_entries = official_example_entries_by_voucher["A1"]
     assert len(a1_entries) == 3
     
-    cash_entry = next((e for e in a1_entries if e.account_number == "1910"), None)
+    [cash_entry] = official_example_entries_by_voucher_account[("A1", "1910")]
     assert cash_entry.amount == -195.00
     assert cash_entry.description == "Kaffebröd"
+    
+    # Every voucher balances to the öre
+    for voucher_index, entries in official_example_entries_by_voucher.items():
+        assert abs(math.fsum(e.amount for e in entries)) < 0.005, voucher_index
 
 
-def test_ver_format_parsing():
-    """Test VER record parsing with various format combinations per SIE specification.
-    
-    VER format: #VER series verno verdate vertext regdate sign
-    Tests quoted/unquoted descriptions and optional fields.
-    """
+VER_CASES = [
     # Quoted description
-    sie_content = '''#FLAGGA 0
+    ("quoted", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -240,13 +309,9 @@ def test_ver_format_parsing():
 {
 #TRANS 1910 {} 1000.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].description == "Test description"
-    assert result.entries[0].voucher_index == "A1"
-    
+''', "Test description", "A1"),
     # Unquoted single-word description
-    sie_content = '''#FLAGGA 0
+    ("unquoted", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -254,12 +319,19 @@ def test_ver_format_parsing():
 {
 #TRANS 1910 {} 500.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].description == "Kaffebröd"
-    
+''', "Kaffebröd", "A2"),
+    # Quoted description starting with a space
+    ("leading-space", '''#FLAGGA 0
+#FORMAT PC8
+#SIETYP 4
+#KONTO 1910 "Kassa"
+#VER A 3 20240315 " Indented" 20240316
+{
+#TRANS 1910 {} 750.00
+}
+''', " Indented", "A3"),
     # Minimal fields (no regdate, no sign)
-    sie_content = '''#FLAGGA 0
+    ("minimal", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -267,12 +339,9 @@ def test_ver_format_parsing():
 {
 #TRANS 1910 {} 250.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].description == "Minimal"
-    
+''', "Minimal", "A4"),
     # Empty description
-    sie_content = '''#FLAGGA 0
+    ("empty", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -280,19 +349,43 @@ def test_ver_format_parsing():
 {
 #TRANS 1910 {} 100.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].description == ""
+''', "", "A5"),
+    # Backslash-escaped quotes inside a quoted description
+    ("escaped-quote", '''#FLAGGA 0
+#FORMAT PC8
+#SIETYP 4
+#KONTO 1910 "Kassa"
+#VER A 6 20240315 "Faktura \\"123\\" betald" 20240316
+{
+#TRANS 1910 {} 50.00
+}
+''', 'Faktura "123" betald', "A6"),
+]
 
 
-def test_trans_object_list_parsing():
-    """Test TRANS record parsing with dimension objects per SIE specification.
+@pytest.mark.parametrize("label,content,description,voucher_index", VER_CASES,
+                         ids=[c[0] for c in VER_CASES])
+def test_ver_format_parsing(label, content, description, voucher_index):
+    """Test VER record parsing with various format combinations per SIE specification.
     
-    TRANS format: #TRANS account no {object list} amount transdate transtext quantity sign
-    Tests complex dimension objects like those in the official example.
+    VER format: #VER series verno verdate vertext regdate sign
+    Tests quoted/unquoted descriptions and optional fields.
     """
+    result = sie_parser.parse_sie(StringIO(content))
+    assert result.entries[0].description == description
+    assert result.entries[0].voucher_index == voucher_index
+
+
+def test_ver_voucher_record():
+    """Test that a VER header is recorded on the SieFile and linked from its entries."""
+    result = sie_parser.parse_sie(StringIO(VER_CASES[0][1]))
+    assert result.entries[0].voucher_index == "A1"
+    assert result.vouchers["A1"] == sie_parser.SieVoucher("A", "1", "20240315", "Test description")
+
+
+TRANS_CASES = [
     # Empty object list
-    sie_content = '''#FLAGGA 0
+    ("empty-object-list", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -300,13 +393,9 @@ def test_trans_object_list_parsing():
 {
 #TRANS 1910 {} 1000.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].account_number == "1910"
-    assert result.entries[0].amount == 1000.00
-    
+''', [("1910", 1000.00, {})]),
     # Complex object list with dimension-object pairs (from official example)
-    sie_content = '''#FLAGGA 0
+    ("dimension-objects", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #DIM 1 "Department"
@@ -320,15 +409,9 @@ def test_trans_object_list_parsing():
 #TRANS 7010 {"1" "456" "7" "47"} 13200.00
 #TRANS 1910 {} -13200.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert len(result.entries) == 2
-    
-    salary_entry = next(e for e in result.entries if e.account_number == "7010")
-    assert salary_entry.amount == 13200.00
-    
+''', [("7010", 13200.00, {"1": "456", "7": "47"}), ("1910", -13200.00, {})]),
     # TRANS without object list braces (legacy format)
-    sie_content = '''#FLAGGA 0
+    ("no-object-list", '''#FLAGGA 0
 #FORMAT PC8
 #SIETYP 4
 #KONTO 1910 "Kassa"
@@ -336,47 +419,44 @@ def test_trans_object_list_parsing():
 {
 #TRANS 1910 1000.00
 }
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
-    assert result.entries[0].amount == 1000.00
+''', [("1910", 1000.00, {})]),
+]
 
 
-def test_cp437_encoding_requirement():
+@pytest.mark.parametrize("label,content,expected", TRANS_CASES, ids=[c[0] for c in TRANS_CASES])
+def test_trans_object_list_parsing(label, content, expected):
+    """Test TRANS record parsing with dimension objects per SIE specification.
+    
+    TRANS format: #TRANS account no {object list} amount transdate transtext quantity sign
+    Tests complex dimension objects like those in the official example.
+    """
+    result = sie_parser.parse_sie(StringIO(content))
+    assert [(e.account_number, e.amount, e.dimensions) for e in result.entries] == expected
+
+
+@pytest.fixture(scope="session")
+def encoded_test_files(tmp_path_factory):
+    """Write the same small SIE file once per session in each tested encoding."""
+    directory = tmp_path_factory.mktemp("sie_encodings")
+    paths = {}
+    for encoding in ("cp437", "utf-8"):
+        path = directory / f"{encoding}.sie"
+        path.write_text(_ENCODING_TEST_SIE, encoding=encoding)
+        paths[encoding] = str(path)
+    return paths
+
+
+@pytest.mark.parametrize("file_encoding,parse_encoding", [
+    ("cp437", None),  # Default encoding
+    ("utf-8", "utf-8"),  # Explicit encoding parameter override
+])
+def test_cp437_encoding_requirement(encoded_test_files, file_encoding, parse_encoding):
     """Test CP437 encoding compliance per SIE 4B specification.
     
     The specification mandates IBM PC 8-bits extended ASCII (Codepage 437).
     """
-    import tempfile
-    import os
-    
-    test_content = '''#FLAGGA 0
-#FORMAT PC8
-#SIETYP 4
-#FNAMN "Test Company AB"
-#KONTO 1910 "Kassa"
-'''
-    
-    # Test proper CP437 encoding
-    with tempfile.NamedTemporaryFile(mode='w', encoding='cp437', delete=False, suffix='.sie') as f:
-        f.write(test_content)
-        temp_file = f.name
-    
-    try:
-        result = sie_parser.parse_sie_file(temp_file)
-        assert result.company_name == "Test Company AB"
-    finally:
-        os.unlink(temp_file)
-    
-    # Test explicit encoding parameter override
-    with tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.sie') as f:
-        f.write(test_content)
-        temp_file = f.name
-    
-    try:
-        result = sie_parser.parse_sie_file(temp_file, encoding='utf-8')
-        assert result.company_name == "Test Company AB"
-    finally:
-        os.unlink(temp_file)
+    result = sie_parser.parse_sie_file(encoded_test_files[file_encoding], encoding=parse_encoding)
+    assert result.company_name == "Test Company AB"
 
 
 def test_specification_compliance():
@@ -385,40 +465,16 @@ def test_specification_compliance():
     Validates voucher structure, balance requirements, and data integrity.
     """
     # FORMAT field should specify PC8
-    sie_content = '''#FLAGGA 0
-#FORMAT PC8
-#SIETYP 4
-#KONTO 1910 "Kassa"
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
+    result = sie_parser.parse_sie(StringIO(_FORMAT_PC8_SIE))
     assert result.file_format == "PC8"
     
     # VER must be followed by TRANS items within braces
-    sie_content = '''#FLAGGA 0
-#FORMAT PC8
-#SIETYP 4
-#KONTO 1910 "Kassa"
-#KONTO 2640 "VAT"
-#KONTO 4010 "Expenses"
-#VER A 1 20240315 "Test verification"
-{
-#TRANS 1910 {} -1000.00
-#TRANS 2640 {} 200.00
-#TRANS 4010 {} 800.00
-}
-'''
-    result = sie_parser.parse_sie(StringIO(sie_content))
+    result = sie_parser.parse_sie(StringIO(_BALANCED_VOUCHER_SIE))
     assert len(result.entries) == 3
     
     # All transactions should have same voucher index
-    voucher_indices = {e.voucher_index for e in result.entries}
-    assert len(voucher_indices) == 1
-    assert "A1" in voucher_indices
+    assert result.entries[0].voucher_index == "A1"
+    assert all(e.voucher_index == "A1" for e in result.entries)
     
     # Verifications should balance (sum to zero)
-    total_amount = sum(e.amount for e in result.entries)
-    assert abs(total_amount) < 0.01
-
-
-if __name__ == "__main__":
-    pytest.main([__file__]) 
\ No newline at end of file
+    assert math.fsum(e.amount for e in result.entries) == 0.0